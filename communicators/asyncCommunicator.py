@@ -0,0 +1,466 @@
+import time
+import select
+import socket
+import numpy as np
+from baseCommunicator import BaseCommunicator
+
+class EvaluationBatch(object):
+	'''Handle for a list of Individuals submitted for evaluation
+     with AsyncCommunicator.submit(). Works as a future:
+       done() - True when all the Individuals are evaluated
+       wait(timeout=None) - processes the communication until
+         all Individuals are evaluated or the timeout (in seconds)
+         expires; returns done()
+     and as a stream: iterating over the batch yields the
+     Individuals in the order in which their evaluations arrive.'''
+	def __init__(self, communicator, indivList):
+		self.communicator = communicator
+		self.individuals = indivList
+		self.remaining = len(indivList)
+		self.arrived = []
+		self.latencies = [] # seconds from dispatch to evaluation, for the evaluated Individuals
+
+	def done(self):
+		return self.remaining == 0
+
+	def wait(self, timeout=None):
+		deadline = None if timeout is None else time.time() + timeout
+		while not self.done() and (deadline is None or time.time() < deadline):
+			self.communicator.step()
+		self.communicator._flushRecord()
+		return self.done()
+
+	def __iter__(self):
+		while not self.done() or self.arrived:
+			if self.arrived:
+				yield self.arrived.pop(0)
+			else:
+				self.communicator.step()
+		self.communicator._flushRecord()
+
+	def _evaluationArrived(self, indiv):
+		self.remaining -= 1
+		self.arrived.append(indiv)
+
+class AsyncCommunicator(BaseCommunicator):
+	'''Base class for communicators which talk to several
+     workers at once. The workers may return the evaluations
+     in any order: every evaluation line is matched to its
+     Individual by the ID it starts with. Individuals whose
+     evaluations are missing or malformed are resubmitted, at
+     most maxRetries times.
+
+     The server is written in Python 2, so instead of asyncio
+     the communication is driven by a select() loop. Besides
+     the blocking evaluate(), there is
+       submit(indivList) - returns an EvaluationBatch, which
+         can be waited on or iterated over; several batches
+         may be in flight at once;
+       evaluateStreaming(indivList) - generator which yields
+         the Individuals as soon as they are evaluated.
+
+     Workers are objects with the following interface:
+       chunk - list of Individuals the worker is busy with,
+         None if the worker is idle
+       submit(chunk, lines) - start working on a chunk, given
+         the Individuals and their string representations
+       fileno(), wantsToRead(), wantsToWrite()
+       handleWritable()
+       handleReadable() - returns the list of evaluation lines
+         received so far; sets chunk to None once the answer
+         for the whole chunk has arrived
+     Worker methods signal failures by raising EOFError,
+     IOError, OSError or socket.error.
+
+     Derived classes must keep the list of workers at
+     self.workers and may redefine the following hooks:
+       _maintainWorkers() - called at every iteration
+       _workerFailed(worker, reason) - restart or drop the worker
+       _chunkSizeFor(worker, numIdle) - how many queued
+         Individuals to give to an idle worker
+       _extraReadables(), _handleExtraReadable(item) - for
+         additional file descriptors such as listening sockets
+       _workerStalled(worker) - the worker is busy for longer
+         than hardTimeout with a chunk which needs no evaluations
+         anymore
+       _selectTimeout()
+
+     Optional parameters:
+       chunkSize - number of Individuals given to a worker at once
+       deadlinePolicy - when an evaluation is considered late:
+         'none' (default), 'absolute' (after deadline seconds),
+         'median' (after deadlineMultiplier times the median
+         evaluation time of the batch) or 'percentile' (after
+         the deadlinePercentile-th percentile of the evaluation
+         times of the batch). Late Individuals are sent to idle
+         workers once more; the first evaluation to arrive wins.
+       deadline, deadlineMultiplier (default 3),
+         deadlinePercentile (default 90)
+       hardTimeout - seconds after which an evaluation is given up
+         and the Individual gets the fallback score
+       fallbackScore - a number or 'worst' (default) for the
+         lowest score received in the batch so far
+       scheduling - 'fifo' (default): the Individuals are handed
+         out in the order of submission; 'lpt': longest processing
+         time first, based on indiv.evaluationCostEstimate() mapped
+         to seconds by a linear model fitted to the measured chunk
+         times. Unless chunkSize is given, the queue is split among
+         all the workers so that their expected finishing times
+         are as close as possible, and the idle workers get their
+         shares at once; this replaces _chunkSizeFor().'''
+	def __init__(self, params=None):
+		super(AsyncCommunicator, self).__init__(params=params)
+		self._checkDeadlineParams()
+		self.workers = []
+		self._resetQueues()
+		self.costModel = np.zeros((2, 3)) # decaying sums for the least squares fit of chunk time = slope*estimates + intercept*count
+		self.costSlope = 1.
+		self.costIntercept = 0.
+
+	def optionalParametersTranslator(self):
+		t = super(AsyncCommunicator, self).optionalParametersTranslator()
+		t['toInt'].add('chunkSize')
+		t['toString'].update({'deadlinePolicy', 'fallbackScore', 'scheduling'})
+		t['toFloat'].update({'deadline', 'deadlineMultiplier', 'deadlinePercentile', 'hardTimeout'})
+		return t
+
+	def _checkDeadlineParams(self):
+		self.setParamDefault('deadlinePolicy', 'none')
+		self.setParamDefault('deadlineMultiplier', 3.)
+		self.setParamDefault('deadlinePercentile', 90.)
+		self.setParamDefault('fallbackScore', 'worst')
+		self.setParamDefault('scheduling', 'fifo')
+		if not self.params['scheduling'] in ['fifo', 'lpt']:
+			raise ValueError('Unknown scheduling ' + self.params['scheduling'] + ', must be fifo or lpt')
+		if not self.params['deadlinePolicy'] in ['none', 'absolute', 'median', 'percentile']:
+			raise ValueError('Unknown deadline policy ' + self.params['deadlinePolicy'] + ', must be none, absolute, median or percentile')
+		if self.params['deadlinePolicy'] == 'absolute' and not self.paramExists('deadline'):
+			raise ValueError('Absolute deadline policy requires the deadline parameter')
+		if self.params['fallbackScore'] != 'worst':
+			float(self.params['fallbackScore'])
+
+	def _resetQueues(self):
+		self.queue = []    # Individuals waiting to be sent to a worker
+		self.queued = set()  # id()s of the objects in the queue
+		self.pending = {}  # ID -> list of Individuals which were submitted, but are not evaluated yet
+		self.owners = {}   # id() of a pending Individual -> its EvaluationBatch
+		self.retries = {}  # id() of a pending Individual -> number of times it was resubmitted
+		self.dispatchedAt = {} # id() of a pending Individual -> time when it was first given to a worker
+		self.speculated = set() # id()s of the pending Individuals which were sent to a second worker
+		self.busySince = {} # worker -> time when it got its current chunk
+		self.estimates = {} # id() of a pending Individual -> its evaluation cost estimate
+		self.busyEstimates = {} # worker -> (sum of the cost estimates, number of Individuals) for its current chunk
+
+	def __getstate__(self):
+		# workers hold processes and sockets, which cannot be pickled
+		state = super(AsyncCommunicator, self).__getstate__()
+		state['workers'] = []
+		for name in ['queue', 'queued', 'pending', 'owners', 'retries', 'dispatchedAt', 'speculated', 'busySince', 'estimates', 'busyEstimates']:
+			del state[name]
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._resetQueues()
+
+	def _evaluateBatch(self, indivList):
+		self.submit(indivList).wait()
+		return indivList
+
+	def evaluateStreaming(self, indivList):
+		return iter(self.submit(indivList))
+
+	def submit(self, indivList):
+		batch = EvaluationBatch(self, indivList)
+		for indiv in indivList:
+			self.pending.setdefault(indiv.id, []).append(indiv)
+			self.owners[id(indiv)] = batch
+			if self.params['scheduling'] == 'lpt':
+				self.estimates[id(indiv)] = indiv.evaluationCostEstimate()
+			self._enqueue(indiv)
+		return batch
+
+	def _enqueue(self, indiv):
+		if not id(indiv) in self.queued:
+			self.queue.append(indiv)
+			self.queued.add(id(indiv))
+
+	def _isPending(self, indiv):
+		return id(indiv) in self.owners
+
+	def _takeChunk(self, size):
+		chunk = []
+		while self.queue and len(chunk) < size:
+			indiv = self.queue.pop(0)
+			self.queued.discard(id(indiv))
+			if self._isPending(indiv):
+				chunk.append(indiv)
+		return chunk
+
+	def _dispatch(self):
+		idle = [ w for w in self.workers if w.chunk is None ]
+		if idle and self.queue and self.params['scheduling'] == 'lpt':
+			if not self.paramExists('chunkSize'):
+				self._dispatchLPT(idle)
+				return
+			self._sortQueueByCost()
+		for i, worker in enumerate(idle):
+			if not self.queue:
+				return
+			chunk = self._takeChunk(self._chunkSizeFor(worker, len(idle) - i))
+			if chunk:
+				self._submitChunk(worker, chunk)
+
+	def _submitChunk(self, worker, chunk):
+		worker.submit(chunk, self.fidelityLines() + [ str(indiv) for indiv in chunk ])
+		now = time.time()
+		self.busySince[worker] = now
+		for indiv in chunk:
+			self.dispatchedAt.setdefault(id(indiv), now)
+		if self.params['scheduling'] == 'lpt':
+			self.busyEstimates[worker] = (sum(self._estimates(chunk)), len(chunk))
+
+	# Longest processing time first scheduling
+
+	def _estimates(self, indivList):
+		'''Cost estimates of the pending Individuals, with the
+       mean estimate for those which have none'''
+		known = [ e for e in self.estimates.itervalues() if not e is None ]
+		mean = float(sum(known))/len(known) if known else 1.
+		estimates = [ self.estimates.get(id(indiv)) for indiv in indivList ]
+		return [ mean if e is None else float(e) for e in estimates ]
+
+	def _predictedCosts(self, indivList):
+		return [ self.costSlope*e + self.costIntercept for e in self._estimates(indivList) ]
+
+	def _sortQueueByCost(self):
+		candidates = [ indiv for indiv in self.queue if self._isPending(indiv) ]
+		costs = self._predictedCosts(candidates)
+		order = sorted(range(len(candidates)), key=lambda i: costs[i], reverse=True)
+		self.queue = [ candidates[i] for i in order ]
+		self.queued = set([ id(indiv) for indiv in self.queue ])
+
+	def _workerSpeeds(self):
+		'''Relative speeds of the workers, from their throughput
+       where the workers measure it (see tcpBroker)'''
+		rates = [ getattr(w, 'throughput', None) for w in self.workers ]
+		known = [ r for r in rates if r ]
+		if not known:
+			return [1.]*len(self.workers)
+		mean = sum(known)/len(known)
+		return [ r/mean if r else 1. for r in rates ]
+
+	def _dispatchLPT(self, idle):
+		'''Assigns the queued Individuals, longest first, to the worker
+       which would finish them the earliest, counting the remaining
+       expected time of the busy workers. The idle workers get their
+       shares, the shares of the busy workers stay in the queue.'''
+		self._sortQueueByCost()
+		candidates = self.queue
+		costs = self._predictedCosts(candidates)
+		speeds = self._workerSpeeds()
+		now = time.time()
+		loads = []
+		for worker, speed in zip(self.workers, speeds):
+			if worker.chunk is None or not self.busyEstimates.has_key(worker):
+				loads.append(0.)
+			else:
+				estimate, count = self.busyEstimates[worker]
+				expected = (self.costSlope*estimate + self.costIntercept*count)/speed
+				loads.append(max(0., expected - (now - self.busySince[worker])))
+		shares = [ [] for _ in self.workers ]
+		for indiv, cost in zip(candidates, costs):
+			best = min(range(len(self.workers)), key=lambda w: loads[w] + cost/speeds[w])
+			shares[best].append(indiv)
+			loads[best] += cost/speeds[best]
+		self.queue = []
+		self.queued = set()
+		for worker, share in zip(self.workers, shares):
+			if worker in idle:
+				if share:
+					self._submitChunk(worker, share)
+			else:
+				for indiv in share:
+					self._enqueue(indiv)
+		self._sortQueueByCost()
+
+	def _chunkTimed(self, worker, seconds):
+		'''Refines the linear model of the evaluation time with the
+       time the worker spent on its chunk'''
+		if not self.busyEstimates.has_key(worker):
+			return
+		estimate, count = self.busyEstimates.pop(worker)
+		self.costModel *= 0.9 # the conditions of the evaluation may drift
+		self.costModel += np.outer([estimate, count], [estimate, count, seconds])
+		a = self.costModel[:,:2]
+		b = self.costModel[:,2]
+		if abs(np.linalg.det(a)) > 1e-9*max(np.abs(a).max()**2, 1e-300):
+			slope, intercept = np.linalg.solve(a, b)
+			if slope > 0 and intercept >= 0:
+				self.costSlope, self.costIntercept = slope, intercept
+				return
+		if a[0,0] > 0:
+			self.costSlope, self.costIntercept = b[0]/a[0,0], 0. # time proportional to the estimate
+
+	def _acceptEvaluations(self, lines):
+		for line in lines:
+			fields = line.split(None, 1)
+			if fields == []:
+				continue
+			try:
+				ID = int(fields[0])
+			except ValueError:
+				print 'Discarding malformed evaluation line: ' + line.strip()
+				continue
+			if not self.pending.has_key(ID):
+				continue # a late duplicate
+			indiv = self.pending[ID][0]
+			try:
+				self._setEvaluation(indiv, line)
+			except ValueError as e:
+				print 'Problem reading evaluation of individual ' + str(ID) + ': ' + e.args[0]
+				continue
+			self.owners[id(indiv)].latencies.append(time.time() - self.dispatchedAt[id(indiv)])
+			self._evaluationDone(indiv)
+
+	def _evaluationDone(self, indiv):
+		self.pending[indiv.id] = [ other for other in self.pending[indiv.id] if not other is indiv ]
+		if self.pending[indiv.id] == []:
+			del self.pending[indiv.id]
+		self.retries.pop(id(indiv), None)
+		self.dispatchedAt.pop(id(indiv), None)
+		self.speculated.discard(id(indiv))
+		self.estimates.pop(id(indiv), None)
+		self.owners.pop(id(indiv))._evaluationArrived(indiv)
+
+	def _requeueUnevaluated(self, chunk):
+		missing = [ indiv for indiv in chunk if self._isPending(indiv) ]
+		if missing:
+			print 'Resubmitting individuals with missing evaluations: ' + ' '.join([ str(indiv.id) for indiv in missing ])
+			for indiv in missing:
+				self.retries[id(indiv)] = self.retries.get(id(indiv), 0) + 1
+				if self.retries[id(indiv)] > self.params['maxRetries']:
+					raise RuntimeError('No valid evaluation for individual ' + str(indiv.id) + ' after ' + str(self.params['maxRetries']) + ' retries')
+				self.dispatchedAt.pop(id(indiv), None) # the time is counted anew from the next dispatch
+				self._enqueue(indiv)
+
+	# Deadlines
+
+	def _deadlineFor(self, batch):
+		'''Seconds after which an evaluation from the batch is late,
+       None if there is not enough data to tell yet'''
+		policy = self.params['deadlinePolicy']
+		if policy == 'absolute':
+			return self.params['deadline']
+		latencies = batch.latencies
+		if policy == 'median':
+			if len(latencies) < 0.5*len(batch.individuals):
+				return None
+			return self.params['deadlineMultiplier']*np.median(latencies)
+		if len(latencies) == 0 or len(latencies) < self.params['deadlinePercentile']*len(batch.individuals)/100.:
+			return None
+		return np.percentile(latencies, self.params['deadlinePercentile'])
+
+	def _fallbackScoreFor(self, batch):
+		if self.params['fallbackScore'] != 'worst':
+			return float(self.params['fallbackScore'])
+		scores = [ indiv.score for indiv in batch.individuals if not self._isPending(indiv) and hasattr(indiv, 'score') ]
+		return min(scores) if scores else float('-inf')
+
+	def _giveUp(self, indiv):
+		score = self._fallbackScoreFor(self.owners[id(indiv)])
+		print 'Evaluation of individual ' + str(indiv.id) + ' timed out, assigning the fallback score ' + repr(score)
+		indiv.setEvaluation(str(indiv.id) + ' ' + repr(score)) # bypasses the cache
+		self._record(indiv, str(indiv.id) + ' ' + repr(score)) # a replay must reproduce the fallback too
+		self._evaluationDone(indiv)
+
+	def _checkDeadlines(self):
+		if self.params['deadlinePolicy'] == 'none' and not self.paramExists('hardTimeout'):
+			return
+		now = time.time()
+		spareWorkers = len([ w for w in self.workers if w.chunk is None ]) - len(self.queue)
+		for worker in self.workers:
+			if worker.chunk is None:
+				continue
+			for indiv in worker.chunk:
+				if not self._isPending(indiv):
+					continue
+				elapsed = now - self.dispatchedAt[id(indiv)]
+				if self.paramExists('hardTimeout') and elapsed > self.params['hardTimeout']:
+					self._giveUp(indiv)
+					continue
+				if spareWorkers <= 0 or id(indiv) in self.speculated or id(indiv) in self.queued or self.params['deadlinePolicy'] == 'none':
+					continue
+				deadline = self._deadlineFor(self.owners[id(indiv)])
+				if not deadline is None and elapsed > deadline:
+					print 'Evaluation of individual ' + str(indiv.id) + ' is late (' + ('%.1f' % elapsed) + ' s), sending it to another worker'
+					self.speculated.add(id(indiv))
+					self._enqueue(indiv)
+					spareWorkers -= 1
+			if self.paramExists('hardTimeout') and now - self.busySince[worker] > self.params['hardTimeout'] and not any([ self._isPending(indiv) for indiv in worker.chunk ]):
+				self._workerStalled(worker)
+
+	def _fail(self, worker, reason):
+		chunk = worker.chunk
+		self.busySince.pop(worker, None)
+		self.busyEstimates.pop(worker, None)
+		self._workerFailed(worker, reason)
+		if chunk:
+			self._requeueUnevaluated(chunk)
+
+	def step(self):
+		'''One iteration of the communication loop'''
+		self._maintainWorkers()
+		self._checkDeadlines()
+		self._dispatch()
+		extras = self._extraReadables()
+		readers = [ w for w in self.workers if w.wantsToRead() ] + extras
+		writers = [ w for w in self.workers if w.wantsToWrite() ]
+		readable, writable, _ = select.select(readers, writers, [], self._selectTimeout())
+		for worker in writable:
+			try:
+				worker.handleWritable()
+			except (IOError, OSError, socket.error), e:
+				self._fail(worker, str(e))
+		for item in readable:
+			if item in extras:
+				self._handleExtraReadable(item)
+				continue
+			if not item in self.workers:
+				continue # failed while writing
+			chunk = item.chunk
+			try:
+				lines = item.handleReadable()
+			except (EOFError, IOError, OSError, socket.error, ValueError), e:
+				self._fail(item, str(e))
+				continue
+			self._acceptEvaluations(lines)
+			if item.chunk is None and chunk:
+				if self.params['scheduling'] == 'lpt':
+					self._chunkTimed(item, time.time() - self.busySince[item])
+				self._requeueUnevaluated(chunk)
+
+	# Hooks for the derived classes
+
+	def _maintainWorkers(self):
+		pass
+
+	def _workerFailed(self, worker, reason):
+		raise NotImplementedError('Derived communicators must define how to handle failed workers')
+
+	def _chunkSizeFor(self, worker, numIdle):
+		if self.paramExists('chunkSize'):
+			return self.params['chunkSize']
+		return (len(self.queue) + numIdle - 1) / numIdle
+
+	def _workerStalled(self, worker):
+		pass
+
+	def _extraReadables(self):
+		return []
+
+	def _handleExtraReadable(self, item):
+		pass
+
+	def _selectTimeout(self):
+		return 0.1
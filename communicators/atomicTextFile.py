@@ -0,0 +1,140 @@
+import os
+import time
+import errno
+import select
+import ctypes
+import ctypes.util
+from baseCommunicator import BaseCommunicator
+from textEncoding import encodeIndividuals
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+def sequenceHeader(seq):
+	return '#seq ' + str(seq) + '\n'
+
+def writeAtomically(filename, text):
+	'''Writes the text into a temporary file in the same directory,
+     then renames it, so that the readers never see a partially
+     written file'''
+	tmpFileName = filename + '.tmp.' + str(os.getpid())
+	with open(tmpFileName, 'w') as f:
+		f.write(text)
+		f.flush()
+		os.fsync(f.fileno())
+	os.rename(tmpFileName, filename)
+
+def readSequenced(filename):
+	'''Returns a tuple (seq, lines) for a file with a sequence header,
+     or (None, []) if the file does not exist or has no header'''
+	try:
+		with open(filename, 'r') as f:
+			lines = f.read().splitlines()
+	except IOError as e:
+		if e.errno == errno.ENOENT:
+			return None, []
+		raise
+	if lines == [] or not lines[0].startswith('#seq '):
+		return None, []
+	return int(lines[0].split()[1]), lines[1:]
+
+class DirectoryWatcher(object):
+	'''Waits for files to be created or renamed in a directory.
+     Uses inotify through ctypes where available (Linux). Elsewhere,
+     or if inotify fails, polls with an exponentially growing
+     interval. Either way, wait() returns after at most maxWait
+     seconds, so that the changes inotify cannot see (e.g. made
+     by the other machines on a network filesystem) are noticed.'''
+	def __init__(self, directory, maxWait):
+		self.directory = directory
+		self.maxWait = maxWait
+		self.fd = None
+		self.pollInterval = 0.001
+		try:
+			libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+			fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+			if fd < 0:
+				return
+			if libc.inotify_add_watch(fd, directory, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+				os.close(fd)
+				return
+			self.fd = fd
+		except (OSError, AttributeError, TypeError):
+			pass # no inotify, falling back to polling
+
+	def reset(self):
+		self.pollInterval = 0.001
+
+	def wait(self):
+		if self.fd is None:
+			time.sleep(self.pollInterval)
+			self.pollInterval = min(2*self.pollInterval, self.maxWait)
+			return
+		readable, _, _ = select.select([self.fd], [], [], self.maxWait)
+		if readable:
+			try:
+				os.read(self.fd, 65536) # the events themselves are not needed, the caller checks the file
+			except OSError as e:
+				if e.errno != errno.EAGAIN:
+					raise
+
+	def close(self):
+		if not self.fd is None:
+			os.close(self.fd)
+			self.fd = None
+
+class Communicator(BaseCommunicator):
+	'''Communicator which uses text files for data exchange
+     between a server and a client, like textFile, but without
+     the races: both sides write their files under temporary
+     names and rename them, so that the other side never reads
+     a partially written file. Every file starts with a line
+
+       #seq <sequence number>
+
+     which increases with every batch; the client answers with
+     the number of the batch it evaluated. The server waits for
+     the evaluations using inotify where available.
+
+     Optional parameters:
+       maxWait - longest time in seconds between the checks of
+         the evaluations file (default 0.05). Matters only where
+         inotify is not available or does not see the changes,
+         e.g. on network filesystems.'''
+	def __init__(self, fninput='evaluations.txt', fnoutput='individuals.txt', params=None):
+		super(Communicator, self).__init__(params=params)
+		self.fninput = fninput
+		self.fnoutput = fnoutput
+		self.setParamDefault('maxWait', 0.05)
+		self.seq = int(time.time()*1000) # unlike a counter, never repeats the numbers found in the files left by the previous runs
+		self.watcher = None
+
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toFloat'].add('maxWait')
+		return t
+
+	def __getstate__(self):
+		state = super(Communicator, self).__getstate__()
+		state['watcher'] = None
+		return state
+
+	def write(self, indivList):
+		if self.watcher is None:
+			# watching before the genomes are published, so that the evaluations cannot slip by unnoticed
+			self.watcher = DirectoryWatcher(os.path.dirname(os.path.abspath(self.fninput)), self.params['maxWait'])
+		self.seq += 1
+		if os.path.exists(self.fninput):
+			os.remove(self.fninput) # the client cannot have answered this batch yet
+		writeAtomically(self.fnoutput, sequenceHeader(self.seq) + ''.join([ line + '\n' for line in self.fidelityLines() ]) + encodeIndividuals(indivList))
+
+	def read(self):
+		self.watcher.reset()
+		while True:
+			seq, evaluations = readSequenced(self.fninput)
+			if seq == self.seq:
+				return evaluations
+			self.watcher.wait()
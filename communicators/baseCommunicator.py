@@ -1,38 +1,358 @@
+import gzip
+import hashlib
+import sqlite3
+from collections import OrderedDict
+
+import sys
+sys.path.append('..')
+from commons import translateParametersDictionary, emptyParametersTranslator
+from textEncoding import decodeEvaluations, bulkDecodable
+
 class BaseCommunicator(object):
-	'''Base class for communicators. Provides 
-     a method for generic population evaluation.'''
-	def __init__(self):
-		self.cache = {}
+	'''Base class for communicators. Provides
+     a method for generic population evaluation.
+     Constructor takes an optional dictionary of
+     parameters (the [commParams] section of the
+     config file).
+
+     Optional parameters (see docs/communicators.baseCommunicator):
+       maxRetries - how many times the Individuals with missing
+         or malformed evaluations are resent to the client before
+         giving up (default 10)
+       cache - keep the evaluations of genomes and do not send
+         the genomes which were evaluated before to the client
+       cacheSize - max number of genomes in the cache, least
+         recently used ones are evicted first (default 100000)
+       cacheNoisy - for noisy clients: the cache keeps a running
+         mean of the evaluations of each genome and the number of
+         samples instead of a single evaluation
+       cacheSamples - in noisy mode, number of samples after which
+         the mean is considered final and the genome is not sent
+         to the client anymore (default 1)
+       printCacheStatistics
+       persistentStore - name of an SQLite file in which the
+         evaluations are kept across runs; several servers may
+         share the file. Enables the cache.
+       evaluationEnvironment - tag which distinguishes the
+         evaluations made under different conditions (e.g.
+         different client settings) in the persistent store
+       storeTimeout - seconds to wait for the persistent store
+         locked by another server (default 60)
+       printTrafficStatistics - print the numbers of bytes sent
+         and received so far after every evaluation; only the
+         communicators which count them print anything
+       recordTo - name of a gzipped file to which every genome
+         string evaluated by the client is appended together with
+         its evaluation, for the replay communicator
+
+     evaluate() takes an optional fidelity level, see
+     docs/communicators.baseCommunicator.'''
+	def __init__(self, params=None):
+		if params is None:
+			params = {}
+		self.params = translateParametersDictionary(params, self.optionalParametersTranslator(), requiredParametersTranslator=self.requiredParametersTranslator())
+		self.setParamDefault('cacheSize', 100000)
+		self.setParamDefault('cacheSamples', 1)
+		self.setParamDefault('evaluationEnvironment', '')
+		self.setParamDefault('storeTimeout', 60.)
+		self.setParamDefault('maxRetries', 10)
+		if self.paramExists('persistentStore'):
+			self.params['cache'] = True
+		self.cache = OrderedDict()
+		self.cacheHits = 0
+		self.cacheMisses = 0
+		self.evaluationLines = {}
+		self.store = None
+		self.storeRows = []
+		self.bytesSent = 0
+		self.bytesSentUncompressed = 0
+		self.bytesReceived = 0
+		self.recordedPairs = []
+		self.fidelity = None
+
+	def __getstate__(self):
+		# database connections cannot be pickled, the store is reopened after the recovery
+		state = self.__dict__.copy()
+		state['store'] = None
+		return state
+
+	def optionalParametersTranslator(self):
+		t = emptyParametersTranslator()
+		t['toBool'].update({'cache', 'cacheNoisy', 'printCacheStatistics', 'printTrafficStatistics'})
+		t['toInt'].update({'cacheSize', 'cacheSamples', 'maxRetries'})
+		t['toString'].update({'persistentStore', 'evaluationEnvironment', 'recordTo'})
+		t['toFloat'].add('storeTimeout')
+		return t
+
+	def requiredParametersTranslator(self):
+		return emptyParametersTranslator()
+
+	def setParamDefault(self, paramName, paramVal):
+		if not self.params.has_key(paramName):
+			self.params[paramName] = paramVal
+
+	def paramExists(self, paramName):
+		return hasattr(self, 'params') and self.params.has_key(paramName)
 
-	def evaluate(self, indivList):
+	def paramIsEnabled(self, paramName):
+		return self.paramExists(paramName) and self.params[paramName]
+
+	def evaluate(self, indivList, fidelity=None):
+		'''Evaluates the Individuals. If the fidelity level is given,
+       the client gets it in the line "#fidelity <level>" preceding
+       the genomes; None leaves the choice to the client, normally
+       its full fidelity. Every Individual gets the level of its
+       score as indiv.scoreFidelity.'''
 		if indivList == []:
 			return indivList
+		self.fidelity = fidelity
+		try:
+			if self.paramIsEnabled('cache'):
+				self._evaluateWithCache(indivList)
+			else:
+				self._evaluateBatch(indivList)
+		finally:
+			self.fidelity = None
+		for indiv in indivList:
+			indiv.scoreFidelity = fidelity
+		self._flushRecord()
+		if self.paramIsEnabled('printTrafficStatistics') and self.bytesSentUncompressed > 0:
+			print 'Traffic: ' + str(self.bytesSent) + ' bytes sent (' + str(self.bytesSentUncompressed) + ' before compression), ' + str(self.bytesReceived) + ' bytes received'
+		return indivList
+
+	def _countTraffic(self, sent=0, uncompressed=None, received=0):
+		'''For the communicators which keep the traffic statistics'''
+		self.bytesSent += sent
+		self.bytesSentUncompressed += sent if uncompressed is None else uncompressed
+		self.bytesReceived += received
+
+	def fidelityLines(self):
+		'''Lines to be sent to the client ahead of the genomes of
+       the batch being evaluated, without newlines'''
+		if self.fidelity is None:
+			return []
+		return [ '#fidelity ' + str(self.fidelity) ]
+
+	def _setEvaluation(self, indiv, evaluation):
+		'''All evaluation strings coming from the clients go through here'''
+		indiv.setEvaluation(evaluation)
+		if self.paramIsEnabled('cache'):
+			self.evaluationLines[id(indiv)] = evaluation
+		self._record(indiv, evaluation)
+
+	def _record(self, indiv, evaluation):
+		if self.paramExists('recordTo'):
+			fidelity = '' if self.fidelity is None else '\t' + str(self.fidelity)
+			self.recordedPairs.append(str(indiv) + '\t' + evaluation.strip() + fidelity + '\n')
+
+	def _flushRecord(self):
+		'''Appends the pairs recorded since the last call to the
+       record file as a separate gzip member, so that the file
+       stays readable if the run is interrupted'''
+		if self.recordedPairs:
+			with gzip.open(self.params['recordTo'], 'ab') as record:
+				record.write(''.join(self.recordedPairs))
+			self.recordedPairs = []
 
-		# caching version (draft)
-#		evalNeeded = []
-#		for indiv in indivList:
-#			if not hasattr(indiv, 'score'):
-#				evalNeeded.append(indiv)
-#		self.write(evalNeeded)
-#		evaluations = self.read()
-#		if len(evalNeeded) != len(evaluations):
-#			raise IOError('No of evaluations is different from no of individuals')
-#		for i in xrange(len(evalNeeded)):
-#			evalNeeded[i].setEvaluation(evaluations[i])
-#		return evalNeeded
-
-		# non-caching version
+	def _setEvaluations(self, indivList, evaluations):
+		'''Assigns the evaluation strings to the Individuals with
+       the matching IDs. Parses the whole batch at once if the
+       Individuals use the default evaluation format and the
+       evaluations come in order. Returns the list of Individuals
+       which got no valid evaluation.'''
+		decoded = decodeEvaluations(evaluations) if bulkDecodable(indivList) else None
+		if not decoded is None:
+			ids, scores = decoded
+			if ids.tolist() == [ indiv.id for indiv in indivList ]:
+				self._assignScores(indivList, scores)
+				return []
+		waiting = {}
+		for indiv in indivList:
+			waiting.setdefault(indiv.id, []).append(indiv)
+		for line in evaluations:
+			fields = line.split(None, 1)
+			try:
+				ID = int(fields[0])
+			except (ValueError, IndexError):
+				print 'Discarding malformed evaluation line: ' + line.strip()
+				continue
+			if not waiting.has_key(ID):
+				print 'Discarding evaluation of an unknown individual ' + str(ID)
+				continue
+			try:
+				self._setEvaluation(waiting[ID][0], line)
+			except ValueError as e:
+				print 'Problem reading evaluation of individual ' + str(ID) + ': ' + e.args[0]
+				continue
+			waiting[ID].pop(0)
+			if waiting[ID] == []:
+				del waiting[ID]
+		unevaluated = set([ id(indiv) for sameID in waiting.itervalues() for indiv in sameID ])
+		return [ indiv for indiv in indivList if id(indiv) in unevaluated ]
+
+	def _assignScores(self, indivList, scores):
+		'''Assigns an array of scores to the Individuals in the same
+       order. For the Individuals which read their evaluations with the
+       default BaseIndividual.setEvaluation()'''
+		cacheEnabled = self.paramIsEnabled('cache')
+		recording = self.paramExists('recordTo')
+		for indiv, score in zip(indivList, scores.tolist()):
+			indiv.setEvaluationValues(indiv.id, score)
+			if cacheEnabled:
+				self.evaluationLines[id(indiv)] = str(indiv.id) + ' ' + repr(score)
+			if recording:
+				self._record(indiv, str(indiv.id) + ' ' + repr(score))
+
+	def _exchange(self, indivList):
+		'''Sends the Individuals to the client once and assigns the
+       evaluations which came back. Returns the list of Individuals
+       left without a valid evaluation.'''
 		self.write(indivList)
-		evaluations = self.read()
-		while '' in evaluations:
-			evaluations.remove('')
+		evaluations = [ e for e in self.read() if e != '' ]
+		return self._setEvaluations(indivList, evaluations)
+
+	def _evaluateBatch(self, indivList):
+		'''Sends the Individuals to the client, then resends only
+       the ones which got no valid evaluation, at most maxRetries
+       times'''
+		remaining = indivList
+		retries = 0
+		while True:
+			sent = len(remaining)
+			remaining = self._exchange(remaining)
+			if remaining == []:
+				return indivList
+			if retries == self.params['maxRetries']:
+				raise RuntimeError('No valid evaluations for ' + str(len(remaining)) + ' individual(s) after ' + str(retries) + ' retries')
+			retries += 1
+			print 'Problem reading evaluations: ' + str(len(remaining)) + ' of ' + str(sent) + ' individual(s) left unevaluated'
+			print 'Retrying individuals ' + ' '.join([ str(indiv.id) for indiv in remaining ]) + ' (retry ' + str(retries) + ' of ' + str(self.params['maxRetries']) + ')'
+
+	# Evaluation cache
+
+	def _genomeHash(self, indiv):
+		representation = str(indiv).split(None, 1)
+		genome = representation[1] if len(representation) > 1 else ''
+		if not self.fidelity is None:
+			genome = '#fidelity ' + str(self.fidelity) + '\n' + genome # the default fidelity keeps the keys of the older stores
+		return hashlib.sha1(self.params['evaluationEnvironment'] + '\n' + genome).digest()
+
+	def _cacheEntryIsFinal(self, entry):
+		if self.paramIsEnabled('cacheNoisy'):
+			mean, samples = entry
+			return samples >= self.params['cacheSamples']
+		return True
+
+	def _setEvaluationFromCache(self, indiv, entry):
+		if self.paramIsEnabled('cacheNoisy'):
+			mean, samples = entry
+			indiv.setEvaluation(str(indiv.id) + ' ' + repr(mean))
+		else:
+			indiv.setEvaluation(str(indiv.id) + ' ' + entry)
+
+	def _storeInCache(self, key, indiv):
+		if not self.evaluationLines.has_key(id(indiv)):
+			return # the score did not come from the client, e.g. it is a fallback for a timed out evaluation
+		if self.paramIsEnabled('cacheNoisy'):
+			mean, samples = self.cache.pop(key, (0., 0))
+			mean = (mean*samples + indiv.score)/(samples + 1)
+			entry = (mean, samples + 1)
+			indiv.setEvaluation(str(indiv.id) + ' ' + repr(mean))
+		else:
+			representation = self.evaluationLines.pop(id(indiv)).split(None, 1)
+			entry = representation[1] if len(representation) > 1 else ''
+			self.cache.pop(key, None)
+		self._putInCache(key, entry)
+		if self.paramExists('persistentStore'):
+			self.storeRows.append(self._storeRow(key, entry))
+
+	def _putInCache(self, key, entry):
+		self.cache[key] = entry
+		while len(self.cache) > self.params['cacheSize']:
+			self.cache.popitem(last=False)
+
+	def _lookUp(self, key):
+		'''Returns the cache entry for the genome hash, consulting the
+       persistent store if the genome is not in memory'''
+		if self.cache.has_key(key):
+			entry = self.cache.pop(key) # most recently used entries go to the end
+		else:
+			entry = self._loadFromStore(key)
+			if entry is None:
+				return None
+		self._putInCache(key, entry)
+		return entry
+
+	# Persistent store
+
+	def _openStore(self):
+		self.store = sqlite3.connect(self.params['persistentStore'], timeout=self.params['storeTimeout'])
+		self.store.text_factory = str
+		self.store.execute('PRAGMA journal_mode=WAL') # readers do not block the writers of the other servers
+		with self.store:
+			self.store.execute('CREATE TABLE IF NOT EXISTS evaluations (key BLOB PRIMARY KEY, evaluation TEXT, samples INTEGER)')
+
+	def _storeRow(self, key, entry):
+		if self.paramIsEnabled('cacheNoisy'):
+			mean, samples = entry
+			return (sqlite3.Binary(key), repr(mean), samples)
+		return (sqlite3.Binary(key), entry, 1)
+
+	def _loadFromStore(self, key):
+		if not self.paramExists('persistentStore'):
+			return None
+		if self.store is None:
+			self._openStore()
+		row = self.store.execute('SELECT evaluation, samples FROM evaluations WHERE key = ?', (sqlite3.Binary(key),)).fetchone()
+		if row is None:
+			return None
+		evaluation, samples = row
+		if self.paramIsEnabled('cacheNoisy'):
+			return (float(evaluation), samples)
+		return evaluation
+
+	def _flushStore(self):
+		if self.storeRows == []:
+			return
+		if self.store is None:
+			self._openStore()
 		try:
-			if len(indivList) != len(evaluations):
-				raise ValueError('No of evaluations is different from no of individuals (' +  str(len(indivList))  + ' != '  + str(len(evaluations)) + ')')
-			for i in xrange(len(indivList)):
-				indivList[i].setEvaluation(evaluations[i])
-		except ValueError as e:
-			print 'Problem reading evaluations: ' + e.args[0]
-			print 'Retrying...'
-			return self.evaluate(indivList)
-		return indivList
+			with self.store:
+				self.store.executemany('INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?)', self.storeRows)
+		except sqlite3.OperationalError as e:
+			print 'Could not write the evaluations to the persistent store (' + e.args[0] + '), will retry with the next batch'
+			return
+		self.storeRows = []
+
+	def _evaluateWithCache(self, indivList):
+		keys = {}
+		toEvaluate = []
+		duplicates = {} # genome hash -> Individuals waiting for the evaluation of the same genome
+		for indiv in indivList:
+			key = self._genomeHash(indiv)
+			keys[id(indiv)] = key
+			entry = self._lookUp(key)
+			if not entry is None and self._cacheEntryIsFinal(entry):
+				self._setEvaluationFromCache(indiv, entry)
+				self.cacheHits += 1
+			elif duplicates.has_key(key) and not self.paramIsEnabled('cacheNoisy'):
+				duplicates[key].append(indiv)
+				self.cacheHits += 1
+			else:
+				duplicates[key] = []
+				toEvaluate.append(indiv)
+				self.cacheMisses += 1
+		self.evaluationLines = {}
+		if toEvaluate != []:
+			self._evaluateBatch(toEvaluate)
+		for indiv in toEvaluate:
+			self._storeInCache(keys[id(indiv)], indiv)
+			for duplicate in duplicates[keys[id(indiv)]]:
+				if self.cache.has_key(keys[id(indiv)]):
+					self._setEvaluationFromCache(duplicate, self.cache[keys[id(indiv)]])
+				else:
+					duplicate.setEvaluation(str(duplicate.id) + ' ' + repr(indiv.score))
+		self.evaluationLines = {}
+		self._flushStore()
+		if self.paramIsEnabled('printCacheStatistics'):
+			print 'Evaluation cache: ' + str(self.cacheHits) + ' hits, ' + str(self.cacheMisses) + ' misses, ' + str(len(self.cache)) + ' genomes stored'
@@ -0,0 +1,121 @@
+'''Helpers for the framed batch protocol used by the communicators which
+   keep a connection to their clients open between generations. Every batch
+   travelling in either direction is preceded by a header line
+
+     #batch <batchID> <count>
+
+   followed by exactly <count> lines. The server numbers the batches; the
+   client answers each batch with the evaluations under the same batch ID.
+
+   If the server is configured to compress the batches, it starts every
+   connection by offering the algorithms it accepts, most preferred first:
+
+     #hello <algorithm> <algorithm> ...
+
+   and the client answers with a single algorithm it supports, or "none".
+   After that the server may send any batch of genomes as
+
+     #zbatch <batchID> <count> <algorithm> <size>
+
+   followed by <size> bytes of the compressed lines. The evaluations are
+   never compressed. See docs/communicators.persistentUnixPipe for details.'''
+
+import zlib
+import bz2
+from collections import OrderedDict
+
+compressors = OrderedDict([('zlib', (zlib.compress, zlib.decompress)),
+                           ('bz2', (bz2.compress, bz2.decompress))])
+try:
+	import lzma
+	compressors['lzma'] = (lzma.compress, lzma.decompress)
+except ImportError:
+	pass # not in the standard library of Python 2
+
+def batchHeader(batchID, count):
+	return '#batch ' + str(batchID) + ' ' + str(count) + '\n'
+
+def parseBatchHeader(line):
+	fields = line.split()
+	if len(fields) != 3 or fields[0] != '#batch':
+		raise ValueError('Incorrectly formatted batch header: ' + line.strip())
+	return int(fields[1]), int(fields[2])
+
+def helloLine(algorithms):
+	return '#hello ' + ' '.join(algorithms) + '\n'
+
+def parseHello(line):
+	fields = line.split()
+	if len(fields) < 2 or fields[0] != '#hello':
+		raise ValueError('Incorrectly formatted hello line: ' + line.strip())
+	return fields[1:]
+
+def chooseCompression(offered):
+	'''Returns the first of the offered algorithms which is
+     available here or 'none' '''
+	for algorithm in offered:
+		if compressors.has_key(algorithm):
+			return algorithm
+	return 'none'
+
+def compressionPreferences(spec):
+	'''Parses a comma-separated list of algorithms. Drops lzma
+     if it is not available, raises ValueError for the unknown
+     algorithms.'''
+	algorithms = [ a.strip() for a in spec.split(',') if a.strip() != '' and a.strip() != 'none' ]
+	for algorithm in algorithms:
+		if not algorithm in ['zlib', 'bz2', 'lzma']:
+			raise ValueError('Unknown compression algorithm ' + algorithm + ', must be zlib, bz2 or lzma')
+	return [ a for a in algorithms if compressors.has_key(a) ]
+
+def encodeBatch(batchID, lines, compression='none', threshold=0):
+	'''Returns a tuple (data, uncompressedSize). The batch is
+     compressed if an algorithm is given, the lines take at
+     least threshold bytes and the compression actually helps.'''
+	payload = ''.join([ line + '\n' for line in lines ])
+	plain = batchHeader(batchID, len(lines)) + payload
+	if compression != 'none' and len(payload) >= threshold:
+		packed = compressors[compression][0](payload)
+		if len(packed) < len(payload):
+			return '#zbatch ' + str(batchID) + ' ' + str(len(lines)) + ' ' + compression + ' ' + str(len(packed)) + '\n' + packed, len(plain)
+	return plain, len(plain)
+
+def writeBatch(stream, batchID, lines, compression='none', threshold=0):
+	stream.write(encodeBatch(batchID, lines, compression=compression, threshold=threshold)[0])
+	stream.flush()
+
+def readLine(stream):
+	line = stream.readline()
+	if line == '':
+		raise EOFError('Connection closed by the client')
+	return line
+
+def _readCompressedBatch(stream, line):
+	fields = line.split()
+	if len(fields) != 5 or not compressors.has_key(fields[3]):
+		raise ValueError('Incorrectly formatted compressed batch header: ' + line.strip())
+	batchID, count, size = int(fields[1]), int(fields[2]), int(fields[4])
+	packed = stream.read(size)
+	if len(packed) != size:
+		raise EOFError('Connection closed in the middle of a batch')
+	lines = compressors[fields[3]][1](packed).splitlines(True)
+	if len(lines) != count:
+		raise ValueError('Compressed batch ' + str(batchID) + ' holds ' + str(len(lines)) + ' lines instead of ' + str(count))
+	return batchID, lines
+
+def readBatch(stream, replyStream=None):
+	'''Returns a tuple (batchID, lines). Raises EOFError if the
+     connection gets closed in the middle of the batch. Clients
+     which give the stream for their answers as replyStream
+     take part in the negotiation of the compression.'''
+	line = readLine(stream)
+	while line.startswith('#hello'):
+		if replyStream is None:
+			raise ValueError('The server offers compression, pass replyStream to readBatch() to negotiate it')
+		replyStream.write(helloLine([chooseCompression(parseHello(line))]))
+		replyStream.flush()
+		line = readLine(stream)
+	if line.startswith('#zbatch'):
+		return _readCompressedBatch(stream, line)
+	batchID, count = parseBatchHeader(line)
+	return batchID, [ readLine(stream) for _ in xrange(count) ]
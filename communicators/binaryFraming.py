@@ -0,0 +1,101 @@
+'''Helpers for the binary batch protocol, an alternative to the text
+   protocol for the Individuals with numeric genomes of constant length.
+   All numbers are little-endian. A batch of genomes sent by the server is
+
+     header (40 bytes):
+       char[4]  magic        "EVSB"
+       uint32   headerSize   size of the header in bytes (40)
+       uint64   batchID
+       uint64   count        number of genomes
+       uint64   length       number of values in every genome
+       uint32   dtype        1 - int8, 2 - int32, 3 - float64
+       uint32   reserved     0
+     int64[count]             IDs
+     dtype[count*length]      values, genome after genome
+
+   and the answer of the client is
+
+     header (24 bytes):
+       char[4]  magic        "EVSR"
+       uint32   headerSize   size of the header in bytes (24)
+       uint64   batchID      same as in the request
+       uint64   count        number of evaluations
+     int64[count]             IDs, in the order of the request
+     float64[count]           scores
+
+   Readers must skip the header bytes beyond the fields they know.
+   See docs/communicators.binaryFraming for details.'''
+
+import struct
+import numpy as np
+
+requestHeader = struct.Struct('<4sIQQQII')
+responseHeader = struct.Struct('<4sIQQ')
+
+dtypeCodes = {'int8': 1, 'int32': 2, 'float64': 3}
+dtypesByCode = { code: np.dtype(name).newbyteorder('<') for name, code in dtypeCodes.iteritems() }
+
+idDtype = np.dtype('<i8')
+scoreDtype = np.dtype('<f8')
+
+def packRequest(batchID, indivList):
+	'''Returns the batch of genomes as a string. Raises ValueError
+     if the Individuals have no binary representation or have
+     genomes of different lengths.'''
+	if indivList == []:
+		return requestHeader.pack('EVSB', requestHeader.size, batchID, 0, 0, dtypeCodes['int8'], 0)
+	dtypeName = indivList[0].valuesDtype
+	if dtypeName is None or any([ indiv.valuesDtype != dtypeName for indiv in indivList ]):
+		raise ValueError('Binary protocol requires Individuals with the same numeric valuesDtype')
+	dtype = dtypesByCode[dtypeCodes[dtypeName]]
+	ids = np.array([ indiv.id for indiv in indivList ], dtype=idDtype)
+	try:
+		values = np.array([ indiv.values for indiv in indivList ], dtype=dtype)
+	except ValueError:
+		raise ValueError('Binary protocol requires genomes of the same length')
+	if values.ndim != 2:
+		raise ValueError('Binary protocol requires genomes of the same length')
+	header = requestHeader.pack('EVSB', requestHeader.size, batchID, values.shape[0], values.shape[1], dtypeCodes[dtypeName], 0)
+	return header + ids.tostring() + values.tostring()
+
+def packResponse(batchID, ids, scores):
+	ids = np.asarray(ids, dtype=idDtype)
+	return responseHeader.pack('EVSR', responseHeader.size, batchID, len(ids)) + ids.tostring() + np.asarray(scores, dtype=scoreDtype).tostring()
+
+def readExactly(stream, size):
+	data = stream.read(size)
+	if len(data) != size:
+		raise EOFError('Connection closed by the peer')
+	return data
+
+def _readHeader(stream, headerStruct, magic):
+	fields = headerStruct.unpack(readExactly(stream, headerStruct.size))
+	if fields[0] != magic:
+		raise ValueError('Incorrect magic number in the binary batch header: ' + repr(fields[0]))
+	if fields[1] < headerStruct.size:
+		raise ValueError('Binary batch header is too short (' + str(fields[1]) + ' bytes)')
+	readExactly(stream, fields[1] - headerStruct.size)
+	return fields
+
+def readRequest(stream):
+	'''Returns a tuple (batchID, ids, values), where values is a
+     count x length array. Raises EOFError if the connection gets
+     closed before the end of the batch.'''
+	_, _, batchID, count, length, dtypeCode, _ = _readHeader(stream, requestHeader, 'EVSB')
+	if not dtypesByCode.has_key(dtypeCode):
+		raise ValueError('Unknown dtype code ' + str(dtypeCode))
+	dtype = dtypesByCode[dtypeCode]
+	ids = np.fromstring(readExactly(stream, idDtype.itemsize*count), dtype=idDtype)
+	values = np.fromstring(readExactly(stream, dtype.itemsize*count*length), dtype=dtype).reshape((count, length))
+	return batchID, ids, values
+
+def readResponse(stream):
+	'''Returns a tuple (batchID, ids, scores)'''
+	_, _, batchID, count = _readHeader(stream, responseHeader, 'EVSR')
+	ids = np.fromstring(readExactly(stream, idDtype.itemsize*count), dtype=idDtype)
+	scores = np.fromstring(readExactly(stream, scoreDtype.itemsize*count), dtype=scoreDtype)
+	return batchID, ids, scores
+
+def evaluationLines(ids, scores):
+	'''Converts an answer into the usual evaluation lines "ID score"'''
+	return [ str(ID) + ' ' + repr(score) for ID, score in zip(ids.tolist(), scores.tolist()) ]
@@ -1,15 +1,87 @@
+import time
 from unixPipe import Communicator as unixPipe
 
-def chunks(l, n):
-	'''Yield successive n-sized chunks from l.'''
-	for i in xrange(0, len(l), n):
-		yield l[i:i+n]
-
 class Communicator(unixPipe):
-	'''Communicator which uses unix pipes for 
-     data exchange between a server and a client. 
-     This one is adapted for longer inputs, which it 
-     splits into 500-lines-long chunks.'''
-	def evaluate(self, indivList):
-		for chunk in chunks(indivList, 500):
-			super(Communicator, self).evaluate(chunk)
+	'''Communicator which uses unix pipes for
+     data exchange between a server and a client.
+     This one is adapted for longer inputs, which it
+     splits into chunks. The protocol is the same as for
+     unixPipe, every chunk is sent as a separate batch.
+
+     The chunks are pipelined: the next chunk is formatted
+     while the client evaluates the current one and is
+     written as soon as the client returns the evaluations,
+     before the server parses them. Individuals with missing
+     evaluations go into one of the subsequent chunks.
+
+     By default the size of the chunks is tuned so that the
+     client spends about targetChunkTime seconds on each,
+     based on the measured time per individual.
+
+     Optional parameters:
+       chunkSize - fixed number of Individuals per chunk;
+         disables the tuning
+       initialChunkSize - size of the first chunk (default 500)
+       targetChunkTime - seconds (default 1)
+       minChunkSize, maxChunkSize - bounds for the tuned size
+         (defaults 1 and 10000)'''
+	def __init__(self, fninput='/tmp/evaluations.pipe', fnoutput='/tmp/individuals.pipe', params=None):
+		super(Communicator, self).__init__(fninput=fninput, fnoutput=fnoutput, params=params)
+		self.setParamDefault('initialChunkSize', 500)
+		self.setParamDefault('targetChunkTime', 1.)
+		self.setParamDefault('minChunkSize', 1)
+		self.setParamDefault('maxChunkSize', 10000)
+		self.secondsPerIndividual = None
+
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toInt'].update({'chunkSize', 'initialChunkSize', 'minChunkSize', 'maxChunkSize'})
+		t['toFloat'].add('targetChunkTime')
+		return t
+
+	def currentChunkSize(self):
+		if self.paramExists('chunkSize'):
+			return self.params['chunkSize']
+		if self.secondsPerIndividual is None:
+			return self.params['initialChunkSize']
+		size = int(self.params['targetChunkTime']/max(self.secondsPerIndividual, 1e-9))
+		return min(max(size, self.params['minChunkSize']), self.params['maxChunkSize'])
+
+	def _chunkEvaluated(self, chunkLength, seconds):
+		rate = seconds/chunkLength
+		self.secondsPerIndividual = rate if self.secondsPerIndividual is None else 0.5*self.secondsPerIndividual + 0.5*rate
+
+	def _evaluateBatch(self, indivList):
+		queue = list(indivList)
+		retries = {}
+		chunk = queue[:self.currentChunkSize()]
+		del queue[:len(chunk)]
+		self.write(chunk)
+		sentAt = time.time()
+		while chunk:
+			nextChunk = queue[:self.currentChunkSize()]
+			del queue[:len(nextChunk)]
+			nextData = self.formatBatch(nextChunk) if nextChunk else None # while the client is busy
+			evaluations = [ e for e in self.read() if e != '' ]
+			elapsed = time.time() - sentAt
+			if nextChunk:
+				self.writeFormatted(nextData) # the client gets to work before the evaluations are parsed
+				sentAt = time.time()
+			missing = self._setEvaluations(chunk, evaluations)
+			if len(missing) < len(chunk):
+				self._chunkEvaluated(len(chunk), elapsed)
+			if missing:
+				for indiv in missing:
+					retries[id(indiv)] = retries.get(id(indiv), 0) + 1
+					if retries[id(indiv)] > self.params['maxRetries']:
+						raise RuntimeError('No valid evaluation for individual ' + str(indiv.id) + ' after ' + str(self.params['maxRetries']) + ' retries')
+				print 'Problem reading evaluations: got ' + str(len(evaluations)) + ' line(s) for a chunk of ' + str(len(chunk))
+				print 'Retrying individuals ' + ' '.join([ str(indiv.id) for indiv in missing ])
+				queue += missing
+			chunk = nextChunk
+			if not chunk and queue:
+				chunk = queue[:self.currentChunkSize()]
+				del queue[:len(chunk)]
+				self.write(chunk)
+				sentAt = time.time()
+		return indivList
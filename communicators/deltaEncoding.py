@@ -0,0 +1,93 @@
+'''Delta encoding of the text protocol. Most offspring differ from
+   their parents in a few genes, so instead of the full genome line
+
+     <ID> <value> <value> ...
+
+   the server may send
+
+     <ID> @<parentID> <position>:<value> <position>:<value> ...
+
+   listing only the values which differ from the genome of the parent
+   (positions count from zero). Both sides keep a table of the genomes
+   sent so far, keyed by ID: every genome line, full or delta, is added
+   to the table, an ID which is already there keeps its place and the
+   oldest genomes are dropped when the table grows beyond its size.
+   The server sends a delta only if the parent is in its table. A client
+   with a table at least as large as that of the server thus always
+   knows the parent; a client which does not (e.g. because it was
+   restarted) skips the line, and the server resends the genome in full.
+   See docs/communicators.unixPipe for details.'''
+
+import numpy as np
+from collections import OrderedDict
+from textEncoding import encodeIndividuals, _usesDefault
+
+class DeltaEncoder(object):
+	'''Server side of the delta encoding'''
+	def __init__(self, tableSize):
+		self.tableSize = tableSize
+		self.genomes = OrderedDict()
+
+	def reset(self):
+		'''Call when the client may have lost its table'''
+		self.genomes = OrderedDict()
+
+	def _remember(self, ID, values):
+		if not self.genomes.has_key(ID):
+			self.genomes[ID] = values
+			while len(self.genomes) > self.tableSize:
+				self.genomes.popitem(last=False)
+
+	def encode(self, indivList):
+		'''Returns the list of the genome lines, without newlines.
+       Raises ValueError for the Individuals without numeric
+       genomes or with custom string conversions.'''
+		for indiv in indivList:
+			if indiv.valuesDtype is None or not _usesDefault(indiv, '__str__'):
+				raise ValueError('Delta protocol requires Individuals with a numeric valuesDtype and the default string conversion')
+		lines = [None]*len(indivList)
+		full = []
+		for i, indiv in enumerate(indivList):
+			values = np.array(indiv.values, dtype=indiv.valuesDtype)
+			parentID = getattr(indiv, 'parentID', None)
+			if not self.genomes.has_key(indiv.id) and not parentID is None and self.genomes.has_key(parentID):
+				# an ID seen before is a retry, possibly because the client did not know the parent; those go in full
+				parentValues = self.genomes[parentID]
+				if parentValues.shape == values.shape:
+					changed = np.flatnonzero(values != parentValues)
+					if 2*len(changed) < len(values):
+						lines[i] = str(indiv.id) + ' @' + str(parentID) + ''.join([ ' ' + str(pos) + ':' + str(indiv.values[pos]) for pos in changed.tolist() ])
+			if lines[i] is None:
+				full.append(i)
+			self._remember(indiv.id, values)
+		for i, line in zip(full, encodeIndividuals([ indivList[i] for i in full ]).splitlines()):
+			lines[i] = line
+		return lines
+
+class DeltaDecoder(object):
+	'''Client side of the delta encoding. Keeps the
+     values as strings, exactly as they were sent.'''
+	def __init__(self, tableSize):
+		self.tableSize = tableSize
+		self.genomes = OrderedDict()
+
+	def decode(self, line):
+		'''Returns a tuple (ID, list of value strings) or
+       None if the parent of a delta is not in the table'''
+		fields = line.split()
+		ID = int(fields[0])
+		if len(fields) > 1 and fields[1].startswith('@'):
+			parentID = int(fields[1][1:])
+			if not self.genomes.has_key(parentID):
+				return None
+			values = list(self.genomes[parentID])
+			for change in fields[2:]:
+				pos, value = change.split(':')
+				values[int(pos)] = value
+		else:
+			values = fields[1:]
+		if not self.genomes.has_key(ID):
+			self.genomes[ID] = values
+			while len(self.genomes) > self.tableSize:
+				self.genomes.popitem(last=False)
+		return ID, values
@@ -0,0 +1,167 @@
+import os
+import errno
+import socket
+from baseCommunicator import BaseCommunicator
+from batchFraming import encodeBatch, readBatch, readLine, batchHeader, helloLine, parseHello, compressionPreferences
+from binaryFraming import packRequest, readResponse, evaluationLines
+from deltaEncoding import DeltaEncoder
+
+class Communicator(BaseCommunicator):
+	'''Communicator which keeps a single connection to the
+     client open for the whole run and marks the batches
+     with explicit headers instead of closing the pipes.
+     The connection is either a pair of unix pipes (default)
+     or a unix domain socket.
+
+     If the client disconnects, the communicator waits for
+     a new client and resends the current batch.
+
+     Optional parameters:
+       transport - 'fifo' (default) or 'socket'
+       socketFileName - path of the socket
+         (default /tmp/evs.sock)
+       protocol - 'text' (default), 'binary' (see
+         docs/communicators.binaryFraming) or 'delta' (see
+         docs/communicators.unixPipe)
+       deltaTableSize - same as for unixPipe (default 1000)
+       compression - comma-separated list of the algorithms
+         (zlib, bz2, lzma) offered to the client for the batches
+         of genomes, most preferred first (default none)
+       compressionThreshold - smallest batch, in bytes, which
+         gets compressed (default 4096)'''
+	def __init__(self, fninput='/tmp/evaluations.pipe', fnoutput='/tmp/individuals.pipe', params=None):
+		super(Communicator, self).__init__(params=params)
+		self.fninput = fninput
+		self.fnoutput = fnoutput
+		self.setParamDefault('transport', 'fifo')
+		self.setParamDefault('socketFileName', '/tmp/evs.sock')
+		self.setParamDefault('protocol', 'text')
+		self.setParamDefault('deltaTableSize', 1000)
+		self.setParamDefault('compression', 'none')
+		self.setParamDefault('compressionThreshold', 4096)
+		self.compressionOffer = compressionPreferences(self.params['compression'])
+		if self.compressionOffer and self.params['protocol'] == 'binary':
+			raise ValueError('Compression is only supported for the text and delta protocols')
+		self.compression = 'none'
+		if not self.params['protocol'] in ['text', 'binary', 'delta']:
+			raise ValueError('Unknown protocol ' + self.params['protocol'] + ', must be text, binary or delta')
+		if not self.params['transport'] in ['fifo', 'socket']:
+			raise ValueError('Unknown transport ' + self.params['transport'] + ', must be fifo or socket')
+		if self.params['transport'] == 'fifo':
+			try:
+				os.mkfifo(fninput)
+				os.mkfifo(fnoutput)
+			except OSError, e:
+				pass
+		self.batchID = 0
+		self.deltaEncoder = DeltaEncoder(self.params['deltaTableSize'])
+		self.listener = None
+		self.finput = None
+		self.foutput = None
+
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toString'].update({'transport', 'socketFileName', 'protocol', 'compression'})
+		t['toInt'].update({'deltaTableSize', 'compressionThreshold'})
+		return t
+
+	def __getstate__(self):
+		# open connections cannot be pickled; the client reconnects after the recovery
+		state = super(Communicator, self).__getstate__()
+		state['listener'] = state['finput'] = state['foutput'] = None
+		return state
+
+	def _connect(self):
+		self.deltaEncoder.reset() # a new client knows no genomes; the deltas of the current batch fail once and get resent in full
+		if self.params['transport'] == 'fifo':
+			# the client must open the individuals pipe first and the evaluations pipe second
+			self.foutput = open(self.fnoutput, 'wb')
+			self.finput = open(self.fninput, 'rb')
+		else:
+			if self.listener is None:
+				if os.path.exists(self.params['socketFileName']):
+					os.remove(self.params['socketFileName'])
+				self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+				self.listener.bind(self.params['socketFileName'])
+				self.listener.listen(1)
+			connection, _ = self.listener.accept()
+			self.foutput = connection.makefile('wb')
+			self.finput = connection.makefile('rb')
+			connection.close() # the file objects keep the socket open
+		self.compression = 'none'
+		if self.compressionOffer:
+			self.foutput.write(helloLine(self.compressionOffer))
+			self.foutput.flush()
+			chosen = parseHello(readLine(self.finput))[0]
+			if chosen != 'none' and not chosen in self.compressionOffer:
+				raise ValueError('Client chose compression ' + chosen + ', which was not offered')
+			self.compression = chosen
+
+	def _disconnect(self):
+		for stream in [self.foutput, self.finput]:
+			try:
+				stream.close()
+			except (IOError, socket.error):
+				pass
+		self.finput = None
+		self.foutput = None
+
+	def write(self, indivList):
+		self.batchID += 1
+		if self.params['protocol'] == 'binary':
+			if not self.fidelity is None:
+				raise ValueError('Fidelity levels are not supported by the binary protocol')
+			self.payload = packRequest(self.batchID, indivList)
+		elif self.params['protocol'] == 'delta':
+			self.lines = self.fidelityLines() + self.deltaEncoder.encode(indivList)
+		else:
+			self.lines = self.fidelityLines() + [ str(indiv) for indiv in indivList ]
+		self._send()
+
+	def _send(self):
+		while True:
+			try:
+				if self.foutput is None:
+					self._connect()
+				if self.params['protocol'] == 'binary':
+					data = self.payload
+					uncompressed = len(data)
+				else:
+					data, uncompressed = encodeBatch(self.batchID, self.lines, self.compression, self.params['compressionThreshold'])
+				self.foutput.write(data)
+				self.foutput.flush()
+				self._countTraffic(sent=len(data), uncompressed=uncompressed)
+				return
+			except (EOFError, ValueError) as e:
+				print 'Handshake with the client failed: ' + e.args[0] + '. Waiting for a new one'
+				self._disconnect()
+				continue
+			except (IOError, socket.error), e:
+				if not e.errno in [errno.EPIPE, errno.ECONNRESET]:
+					raise
+				print 'Client disconnected, waiting for a new one'
+				self._disconnect()
+
+	def read(self):
+		while True:
+			try:
+				if self.params['protocol'] == 'binary':
+					batchID, ids, scores = readResponse(self.finput)
+					evaluations = evaluationLines(ids, scores)
+					self._countTraffic(received=24 + 16*len(ids))
+				else:
+					batchID, evaluations = readBatch(self.finput)
+					self._countTraffic(received=len(batchHeader(batchID, len(evaluations))) + sum(map(len, evaluations)))
+			except (EOFError, socket.error):
+				print 'Client disconnected, waiting for a new one'
+				self._disconnect()
+				self._send()
+				continue
+			except ValueError as e:
+				print 'Protocol error: ' + e.args[0] + '. Dropping the client'
+				self._disconnect()
+				self._send()
+				continue
+			if batchID == self.batchID:
+				return evaluations
+			print 'Discarding evaluations of the outdated batch ' + str(batchID)
@@ -0,0 +1,129 @@
+import os
+import imp
+import sys
+import importlib
+import functools
+import multiprocessing
+import numpy as np
+from baseCommunicator import BaseCommunicator
+from textEncoding import bulkDecodable
+
+def importFunction(spec):
+	'''Returns the function given as "module:function", where the
+     module is either a module name, looked up relative to the
+     current directory as well, or the path of a .py file'''
+	if spec.count(':') != 1:
+		raise ValueError('Function must be given as module:function, got ' + spec)
+	moduleName, functionName = spec.split(':')
+	if moduleName.endswith('.py'):
+		module = imp.load_source(os.path.splitext(os.path.basename(moduleName))[0], moduleName)
+	else:
+		if not os.getcwd() in sys.path:
+			sys.path.append(os.getcwd())
+		module = importlib.import_module(moduleName)
+	return getattr(module, functionName)
+
+class Communicator(BaseCommunicator):
+	'''Communicator which evaluates the Individuals by calling a
+     Python function instead of talking to a client. The function
+     gets the values of an Individual (indiv.values, as is) and
+     returns either a number, which becomes the score, or the
+     evaluation string without the ID for the Individuals which
+     read more than a single number. If the evolver requests a
+     fidelity level, the function gets it as the keyword argument
+     fidelity.
+
+     Alternatively, a batch fitness function gets the values of
+     the whole batch as a 2-D array, one row per Individual, and
+     returns an array of scores. This requires Individuals with
+     numeric genomes of constant length (see
+     BaseIndividual.valuesDtype), which read their evaluations
+     with the default setEvaluation().
+
+     Parameters (one of the first two is required):
+       fitnessFunction - the function as module:function, e.g.
+         tests/maxDifferenceFunction.py:maxDifference
+       batchFitnessFunction - the batch function, e.g.
+         tests/maxDifferenceFunction.py:maxDifferenceBatch
+       numWorkers - number of processes evaluating the Individuals
+         (default 1: evaluate in the server process; 0: one process
+         per CPU)
+       chunkSize - number of Individuals sent to a process at once
+         (default: the batch split into four chunks per process; for
+         the batch function, into one block of rows per process)'''
+	def __init__(self, fninput=None, fnoutput=None, params=None):
+		super(Communicator, self).__init__(params=params)
+		self.setParamDefault('numWorkers', 1)
+		if self.params['numWorkers'] == 0:
+			self.params['numWorkers'] = multiprocessing.cpu_count()
+		if self.paramExists('fitnessFunction') == self.paramExists('batchFitnessFunction'):
+			raise ValueError('pythonFunction communicator requires either the fitnessFunction or the batchFitnessFunction parameter')
+		self.function = None
+		self.pool = None
+
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toString'].update({'fitnessFunction', 'batchFitnessFunction'})
+		t['toInt'].update({'numWorkers', 'chunkSize'})
+		return t
+
+	def __getstate__(self):
+		# the function is imported and the processes are started again after the recovery
+		state = super(Communicator, self).__getstate__()
+		state['function'] = state['pool'] = None
+		return state
+
+	def _map(self, function, arguments, chunkSize=None):
+		if self.params['numWorkers'] == 1:
+			return map(function, arguments)
+		if self.pool is None:
+			self.pool = multiprocessing.Pool(self.params['numWorkers'])
+		if chunkSize is None:
+			chunkSize = self.params['chunkSize'] if self.paramExists('chunkSize') else max(1, len(arguments)//(4*self.params['numWorkers']))
+		return self.pool.map(function, arguments, chunkSize)
+
+	def _genomeMatrix(self, indivList):
+		dtypeName = indivList[0].valuesDtype
+		if dtypeName is None or any([ indiv.valuesDtype != dtypeName for indiv in indivList ]) or not bulkDecodable(indivList):
+			raise ValueError('batchFitnessFunction requires Individuals with the same numeric valuesDtype and the default setEvaluation()')
+		try:
+			values = np.array([ indiv.values for indiv in indivList ], dtype=dtypeName)
+		except ValueError:
+			values = None
+		if values is None or values.ndim != 2:
+			raise ValueError('batchFitnessFunction requires genomes of the same length')
+		return values
+
+	def _boundFunction(self):
+		if self.fidelity is None:
+			return self.function
+		return functools.partial(self.function, fidelity=self.fidelity)
+
+	def _exchangeMatrix(self, indivList):
+		values = self._genomeMatrix(indivList)
+		function = self._boundFunction()
+		if self.params['numWorkers'] == 1:
+			scores = function(values)
+		else:
+			blockSize = self.params['chunkSize'] if self.paramExists('chunkSize') else -(-len(indivList)//self.params['numWorkers'])
+			blocks = [ values[start:start+blockSize] for start in xrange(0, len(indivList), blockSize) ]
+			scores = np.concatenate(self._map(function, blocks, 1))
+		scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+		if len(scores) != len(indivList):
+			raise ValueError('batchFitnessFunction returned ' + str(len(scores)) + ' scores for ' + str(len(indivList)) + ' individuals')
+		evaluated = ~np.isnan(scores)
+		self._assignScores([ indivList[i] for i in np.flatnonzero(evaluated) ], scores[evaluated])
+		return [ indivList[i] for i in np.flatnonzero(~evaluated) ]
+
+	def _exchange(self, indivList):
+		if self.paramExists('batchFitnessFunction'):
+			if self.function is None:
+				self.function = importFunction(self.params['batchFitnessFunction'])
+			return self._exchangeMatrix(indivList)
+		if self.function is None:
+			self.function = importFunction(self.params['fitnessFunction'])
+		results = self._map(self._boundFunction(), [ indiv.values for indiv in indivList ])
+		if bulkDecodable(indivList) and all([ isinstance(r, (int, long, float, np.number)) for r in results ]):
+			self._assignScores(indivList, np.array(results, dtype=np.float64))
+			return []
+		return self._setEvaluations(indivList, [ str(indiv.id) + ' ' + (r if isinstance(r, str) else repr(r)) for indiv, r in zip(indivList, results) ])
@@ -0,0 +1,68 @@
+import gzip
+from baseCommunicator import BaseCommunicator
+from commons import emptyParametersTranslator
+
+def _splitID(line):
+	'''Splits a genome or evaluation string into the ID and the rest'''
+	fields = line.split(None, 1)
+	return fields[0], fields[1] if len(fields) > 1 else ''
+
+class Communicator(BaseCommunicator):
+	'''Communicator which needs no client: it answers with the
+     evaluations recorded during an earlier run (see the recordTo
+     parameter of BaseCommunicator). With the same config and the
+     same random seed the server repeats the recorded run exactly,
+     which is useful for profiling and benchmarking the evolvers.
+
+     The genomes are looked up by their values. If the same genome
+     was recorded several times (e.g. with a noisy client), the
+     evaluations are used in the recorded order, preferring the
+     ones recorded for the same ID; once they run out, the last one
+     is reused. The ID in the evaluation is replaced by the ID of
+     the Individual being evaluated. Evaluations recorded at a
+     fidelity level are only used for the requests at the same
+     level.
+
+     Required parameters:
+       replayFrom - the file written with recordTo'''
+	def __init__(self, fninput=None, fnoutput=None, params=None):
+		super(Communicator, self).__init__(params=params)
+		self.recorded = None
+
+	def requiredParametersTranslator(self):
+		t = emptyParametersTranslator()
+		t['toString'].add('replayFrom')
+		return t
+
+	def __getstate__(self):
+		# the record is read again after the recovery
+		state = super(Communicator, self).__getstate__()
+		state['recorded'] = None
+		return state
+
+	def _load(self):
+		self.recorded = {}
+		with gzip.open(self.params['replayFrom'], 'rb') as record:
+			for line in record:
+				fields = line.rstrip('\n').split('\t')
+				genome, evaluation = fields[:2]
+				fidelity = fields[2] if len(fields) > 2 else None
+				ID, values = _splitID(genome)
+				self.recorded.setdefault((values, fidelity), []).append([ID, _splitID(evaluation)[1], False])
+
+	def _recordedEvaluation(self, indiv):
+		if self.recorded is None:
+			self._load()
+		ID, values = _splitID(str(indiv))
+		key = (values, None if self.fidelity is None else str(self.fidelity))
+		if not self.recorded.has_key(key):
+			raise RuntimeError('Genome of individual ' + ID + ' is not in ' + self.params['replayFrom'] + ('' if self.fidelity is None else ' at fidelity ' + str(self.fidelity)))
+		entries = self.recorded[key]
+		unused = [ entry for entry in entries if not entry[2] ]
+		sameID = [ entry for entry in unused if entry[0] == ID ]
+		entry = sameID[0] if sameID else (unused[0] if unused else entries[-1])
+		entry[2] = True
+		return ID + ' ' + entry[1]
+
+	def _exchange(self, indivList):
+		return self._setEvaluations(indivList, [ self._recordedEvaluation(indiv) for indiv in indivList ])
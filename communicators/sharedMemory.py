@@ -0,0 +1,141 @@
+import os
+import time
+import struct
+import tempfile
+import numpy as np
+from persistentUnixPipe import Communicator as persistentUnixPipe
+from binaryFraming import dtypeCodes, dtypesByCode, idDtype, scoreDtype
+from textEncoding import bulkDecodable
+
+bufferHeader = struct.Struct('<4sIQQQIIQQQ')
+bufferHeaderSize = 64
+regionAlignment = 64
+
+def _aligned(offset):
+	return (offset + regionAlignment - 1)//regionAlignment*regionAlignment
+
+class SharedBatchBuffer(object):
+	'''Memory-mapped file with room for capacity genomes of
+     the same length: a column of IDs, a matrix of values and
+     a column of scores, see docs/communicators.sharedMemory.
+     Use createBuffer() on the server and openBuffer() on the
+     client.'''
+	def __init__(self, fileName):
+		self.fileName = fileName
+		with open(fileName, 'rb') as f:
+			fields = bufferHeader.unpack(f.read(bufferHeader.size))
+		magic, _, self.bufferID, self.capacity, self.length, dtypeCode, _, idsOffset, valuesOffset, scoresOffset = fields
+		if magic != 'EVSM':
+			raise ValueError('Incorrect magic number in the shared buffer header: ' + repr(magic))
+		if not dtypesByCode.has_key(dtypeCode):
+			raise ValueError('Unknown dtype code ' + str(dtypeCode))
+		self.dtype = dtypesByCode[dtypeCode]
+		self.ids = np.memmap(fileName, dtype=idDtype, mode='r+', offset=idsOffset, shape=(self.capacity,))
+		self.values = np.memmap(fileName, dtype=self.dtype, mode='r+', offset=valuesOffset, shape=(self.capacity, self.length))
+		self.scores = np.memmap(fileName, dtype=scoreDtype, mode='r+', offset=scoresOffset, shape=(self.capacity,))
+
+def createBuffer(fileName, capacity, length, dtypeName):
+	'''Creates the file under a temporary name and renames it, so
+     that the clients which still map the previous buffer keep
+     their (now unlinked) copy until they are told to reopen'''
+	dtype = dtypesByCode[dtypeCodes[dtypeName]]
+	idsOffset = bufferHeaderSize
+	valuesOffset = _aligned(idsOffset + idDtype.itemsize*capacity)
+	scoresOffset = _aligned(valuesOffset + dtype.itemsize*capacity*length)
+	size = scoresOffset + scoreDtype.itemsize*capacity
+	bufferID = int(time.time()*1000) # the clients reopen the buffer when this changes
+	header = bufferHeader.pack('EVSM', bufferHeaderSize, bufferID, capacity, length, dtypeCodes[dtypeName], 0, idsOffset, valuesOffset, scoresOffset)
+	tmpFileName = fileName + '.tmp.' + str(os.getpid())
+	with open(tmpFileName, 'wb') as f:
+		f.write(header.ljust(bufferHeaderSize, '\0'))
+		f.truncate(size)
+	os.rename(tmpFileName, fileName)
+	return SharedBatchBuffer(fileName)
+
+def openBuffer(fileName):
+	return SharedBatchBuffer(fileName)
+
+def parseDoorbell(line):
+	'''Returns a tuple (bufferID, slot, count, fidelity),
+     the fidelity is None unless the server requested a level'''
+	fields = line.split()
+	return tuple(map(int, fields[:3])) + (fields[3] if len(fields) > 3 else None,)
+
+class Communicator(persistentUnixPipe):
+	'''Communicator for the clients running on the same host
+     which exchanges the genomes and the scores through a
+     memory-mapped file instead of the pipes. Works for the
+     Individuals with numeric genomes of constant length (see
+     BaseIndividual.valuesDtype) which read their evaluations
+     with the default setEvaluation().
+
+     The server writes the IDs and the values of a batch into
+     consecutive rows of the buffer, wrapping around to the
+     first row when the batch does not fit before the end, and
+     sends the client a one-line batch over a persistentUnixPipe
+     connection telling which rows to evaluate. The client puts
+     the scores into the rows of the score column and answers
+     with an empty batch. Scores left NaN are retried.
+
+     Optional parameters:
+       bufferFileName - path of the memory-mapped file (default
+         evs.shm in /dev/shm or, where there is no /dev/shm, in
+         the temporary directory)
+       bufferCapacity - number of rows in the buffer (default
+         10000); larger batches are sent in several parts
+       transport, socketFileName - same as for persistentUnixPipe'''
+	def __init__(self, fninput='/tmp/evaluations.pipe', fnoutput='/tmp/individuals.pipe', params=None):
+		super(Communicator, self).__init__(fninput=fninput, fnoutput=fnoutput, params=params)
+		self.setParamDefault('bufferFileName', os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'evs.shm'))
+		self.setParamDefault('bufferCapacity', 10000)
+		self.params['protocol'] = 'text' # only the doorbells go through the connection
+		self.buffer = None
+		self.head = 0
+
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toString'].add('bufferFileName')
+		t['toInt'].add('bufferCapacity')
+		return t
+
+	def __getstate__(self):
+		state = super(Communicator, self).__getstate__()
+		state['buffer'] = None # recreated after the recovery under a new buffer ID
+		return state
+
+	def _bufferFor(self, indivList):
+		dtypeName = indivList[0].valuesDtype
+		if dtypeName is None or any([ indiv.valuesDtype != dtypeName for indiv in indivList ]) or not bulkDecodable(indivList):
+			raise ValueError('sharedMemory communicator requires Individuals with the same numeric valuesDtype and the default setEvaluation()')
+		length = len(indivList[0].values)
+		if self.buffer is None or self.buffer.length != length or self.buffer.dtype != dtypesByCode[dtypeCodes[dtypeName]]:
+			self.buffer = createBuffer(self.params['bufferFileName'], self.params['bufferCapacity'], length, dtypeName)
+			self.head = 0
+		return self.buffer
+
+	def _exchange(self, indivList):
+		missing = []
+		capacity = self.params['bufferCapacity']
+		for start in xrange(0, len(indivList), capacity):
+			missing += self._exchangeRows(indivList[start:start+capacity])
+		return missing
+
+	def _exchangeRows(self, indivList):
+		buf = self._bufferFor(indivList)
+		count = len(indivList)
+		slot = self.head if self.head + count <= buf.capacity else 0
+		self.head = (slot + count) % buf.capacity
+		try:
+			buf.values[slot:slot+count] = [ indiv.values for indiv in indivList ]
+		except ValueError:
+			raise ValueError('sharedMemory communicator requires genomes of the same length')
+		buf.ids[slot:slot+count] = [ indiv.id for indiv in indivList ]
+		buf.scores[slot:slot+count] = np.nan
+		self.batchID += 1
+		self.lines = [ str(buf.bufferID) + ' ' + str(slot) + ' ' + str(count) + ('' if self.fidelity is None else ' ' + str(self.fidelity)) ]
+		self._send()
+		self.read() # the answer carries no lines, it only says that the scores are in place
+		scores = np.array(buf.scores[slot:slot+count])
+		evaluated = ~np.isnan(scores)
+		self._assignScores([ indivList[i] for i in np.flatnonzero(evaluated) ], scores[evaluated])
+		return [ indivList[i] for i in np.flatnonzero(~evaluated) ]
@@ -0,0 +1,182 @@
+import time
+import errno
+import socket
+from asyncCommunicator import AsyncCommunicator
+from batchFraming import encodeBatch, parseBatchHeader, helloLine, parseHello, compressionPreferences
+
+class RemoteWorker(object):
+	'''Connection to a single evaluation worker. Keeps track of
+     the chunk the worker is busy with and of the worker's
+     throughput (individuals per second, exponentially averaged
+     over the chunks it has completed).
+
+     If compressionOffer is not empty, the algorithms are offered
+     to the worker right away and the chunks are compressed once
+     it chooses one. countTraffic is called with the numbers of
+     bytes which went through the connection.'''
+	def __init__(self, connection, address, compressionOffer=[], compressionThreshold=0, countTraffic=None):
+		self.connection = connection
+		self.connection.setblocking(0)
+		self.address = address
+		self.outbuf = helloLine(compressionOffer) if compressionOffer else ''
+		self.compressionOffer = compressionOffer
+		self.compressionThreshold = compressionThreshold
+		self.compression = 'none'
+		self.countTraffic = countTraffic
+		self.inbuf = ''
+		self.chunk = None
+		self.chunkID = None
+		self.chunkCounter = 0
+		self.answerID = None
+		self.expected = 0
+		self.sentAt = None
+		self.throughput = None
+
+	def fileno(self):
+		return self.connection.fileno()
+
+	def wantsToRead(self):
+		return True # to notice disconnections of idle workers
+
+	def wantsToWrite(self):
+		return self.outbuf != ''
+
+	def submit(self, chunk, lines):
+		self.chunkCounter += 1
+		self.chunkID = self.chunkCounter
+		self.chunk = chunk
+		data, uncompressed = encodeBatch(self.chunkID, lines, self.compression, self.compressionThreshold)
+		self.outbuf += data # may still hold the offer of compression
+		if not self.countTraffic is None:
+			self.countTraffic(uncompressed=uncompressed)
+		self.sentAt = time.time()
+
+	def handleWritable(self):
+		try:
+			sent = self.connection.send(self.outbuf)
+		except socket.error, e:
+			if e.errno == errno.EAGAIN:
+				return
+			raise
+		self.outbuf = self.outbuf[sent:]
+		if not self.countTraffic is None:
+			self.countTraffic(sent=sent, uncompressed=0)
+
+	def _chunkCompleted(self):
+		rate = float(len(self.chunk))/max(time.time() - self.sentAt, 1e-6)
+		self.throughput = rate if self.throughput is None else 0.5*self.throughput + 0.5*rate
+		self.chunk = None
+		self.chunkID = None
+
+	def handleReadable(self):
+		'''Returns the evaluation lines for the current chunk received
+       so far. Workers may stream the evaluations in any order as they
+       complete them. Raises EOFError if the worker disconnects.'''
+		data = self.connection.recv(65536)
+		if data == '':
+			raise EOFError('worker disconnected')
+		if not self.countTraffic is None:
+			self.countTraffic(received=len(data))
+		lines = (self.inbuf + data).split('\n')
+		self.inbuf = lines.pop()
+		evaluations = []
+		for line in lines:
+			if self.expected == 0 and line.startswith('#hello'):
+				chosen = parseHello(line)[0]
+				if chosen != 'none' and not chosen in self.compressionOffer:
+					raise ValueError('worker chose compression ' + chosen + ', which was not offered')
+				self.compression = chosen
+			elif self.expected == 0:
+				self.answerID, self.expected = parseBatchHeader(line)
+			else:
+				self.expected -= 1
+				if self.answerID == self.chunkID:
+					evaluations.append(line)
+			if self.expected == 0 and self.answerID == self.chunkID and not self.chunk is None:
+				self._chunkCompleted()
+		return evaluations
+
+	def close(self):
+		self.connection.close()
+
+class Communicator(AsyncCommunicator):
+	'''Communicator which accepts evaluation workers over TCP
+     and distributes the evaluations among them. Workers may
+     run on any machine and may connect or disconnect at any
+     time; chunks of disconnected workers are reassigned.
+
+     Each batch of Individuals is split into chunks on the fly.
+     The size of the chunk given to a worker is proportional
+     to its measured throughput, so faster machines get more
+     work. The chunks are sent as framed batches over a
+     persistent connection (see docs/communicators.tcpBroker).
+     Evaluations are matched to Individuals by their IDs, so
+     workers may return them in any order.
+
+     Optional parameters:
+       host - address to listen on (default: all interfaces)
+       port - port to listen on (default 7777)
+       minChunkSize - smallest chunk given to a worker (default 1)
+       compression, compressionThreshold - same as for
+         persistentUnixPipe'''
+	def __init__(self, fninput=None, fnoutput=None, params=None):
+		super(Communicator, self).__init__(params=params)
+		self.setParamDefault('host', '')
+		self.setParamDefault('port', 7777)
+		self.setParamDefault('minChunkSize', 1)
+		self.setParamDefault('compression', 'none')
+		self.setParamDefault('compressionThreshold', 4096)
+		self.compressionOffer = compressionPreferences(self.params['compression'])
+		self.listener = None
+
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toString'].update({'host', 'compression'})
+		t['toInt'].update({'port', 'minChunkSize', 'compressionThreshold'})
+		return t
+
+	def __getstate__(self):
+		# workers reconnect after the recovery
+		state = super(Communicator, self).__getstate__()
+		state['listener'] = None
+		return state
+
+	def _listen(self):
+		self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self.listener.bind((self.params['host'], self.params['port']))
+		self.listener.listen(64)
+		print 'Waiting for evaluation workers at port ' + str(self.listener.getsockname()[1])
+
+	def _maintainWorkers(self):
+		if self.listener is None:
+			self._listen()
+
+	def _extraReadables(self):
+		return [self.listener]
+
+	def _handleExtraReadable(self, listener):
+		connection, address = listener.accept()
+		connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		self.workers.append(RemoteWorker(connection, address, self.compressionOffer, self.params['compressionThreshold'], self._countTraffic))
+		print 'Evaluation worker connected from ' + str(address)
+
+	def _workerFailed(self, worker, reason):
+		print 'Dropping worker ' + str(worker.address) + ': ' + reason
+		worker.close()
+		self.workers.remove(worker)
+
+	def _chunkSizeFor(self, worker, numIdle):
+		'''Guided self-scheduling weighted by throughput: the worker
+       gets half of its throughput-proportional share of the
+       Individuals which have not been handed out yet'''
+		remaining = len(self.queue)
+		rates = [ w.throughput for w in self.workers if not w.throughput is None ]
+		defaultRate = sum(rates)/len(rates) if rates else 1.
+		rate = defaultRate if worker.throughput is None else worker.throughput
+		totalRate = sum([ defaultRate if w.throughput is None else w.throughput for w in self.workers ])
+		share = int(0.5*remaining*rate/totalRate)
+		return min(remaining, max(share, self.params['minChunkSize']))
+
+	def _selectTimeout(self):
+		return 1.
@@ -0,0 +1,79 @@
+'''Bulk conversion between lists of Individuals and the text protocol.
+
+   encodeIndividuals() produces the same lines as str(indiv) for the whole
+   batch at once, converting the values with vectorized operations, provided that the
+   Individuals use the default string conversion of BaseIndividual and have
+   numeric genomes of the same length (see BaseIndividual.valuesDtype).
+   Otherwise it falls back to calling str() on every Individual.
+
+   decodeEvaluations() parses the evaluation lines "ID score" into two
+   arrays in one pass.'''
+
+import warnings
+import numpy as np
+
+import sys
+sys.path.append('..')
+from individuals.baseIndividual import BaseIndividual
+
+maxLookupTableSize = 65536
+
+def _usesDefault(indiv, methodName):
+	return getattr(type(indiv), methodName).im_func is getattr(BaseIndividual, methodName).im_func
+
+def _genomeMatrix(indivList):
+	if indivList == []:
+		return None
+	dtypeName = indivList[0].valuesDtype
+	if dtypeName is None:
+		return None
+	for indiv in indivList:
+		if indiv.valuesDtype != dtypeName or not _usesDefault(indiv, '__str__'):
+			return None
+	try:
+		values = np.array([ indiv.values for indiv in indivList ], dtype=np.float64 if dtypeName == 'float64' else np.int64)
+	except (ValueError, TypeError):
+		return None
+	if values.ndim != 2 or values.shape[1] == 0:
+		return None # genomes of different lengths
+	return values
+
+def encodeIndividuals(indivList):
+	'''Returns the string representations of the Individuals,
+     each followed by a newline'''
+	values = _genomeMatrix(indivList)
+	if values is None:
+		return ''.join([ str(indiv) + '\n' for indiv in indivList ])
+	if values.dtype == np.int64 and values.max() - values.min() < maxLookupTableSize:
+		# genomes with few distinct values, e.g. trinary ones: each value is converted into a string only once
+		lowest = values.min()
+		valueStrings = np.array([ str(v) for v in xrange(lowest, values.max() + 1) ], dtype=object)
+		rows = valueStrings[values - lowest].tolist()
+	else:
+		# str() of a Python float is shorter than that of a numpy float, follow the type each genome is stored in
+		rows = [ map(str if type(indiv.values[0]) is float else repr, row) for indiv, row in zip(indivList, values.tolist()) ]
+	return ''.join([ str(indiv.id) + ' ' + ' '.join(row) + '\n' for indiv, row in zip(indivList, rows) ])
+
+def decodeEvaluations(lines):
+	'''Returns a tuple (ids, scores) of arrays if every line
+     consists of two numbers, None otherwise. Callers must
+     check the IDs: lines with wrong numbers of fields may
+     compensate each other.'''
+	with warnings.catch_warnings():
+		warnings.simplefilter('ignore') # numpy warns about the unparseable text instead of raising
+		try:
+			numbers = np.fromstring(' '.join(lines), sep=' ')
+		except ValueError:
+			return None
+	if numbers.size != 2*len(lines):
+		return None
+	pairs = numbers.reshape((len(lines), 2))
+	ids = pairs[:,0]
+	if not np.all(ids == np.floor(ids)):
+		return None
+	return ids.astype(np.int64), pairs[:,1]
+
+def bulkDecodable(indivList):
+	'''True if the Individuals read their evaluations with
+     the default BaseIndividual.setEvaluation()'''
+	return all([ _usesDefault(indiv, 'setEvaluation') for indiv in indivList ])
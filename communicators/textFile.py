@@ -1,12 +1,13 @@
 import os
 import time
 from baseCommunicator import BaseCommunicator
+from textEncoding import encodeIndividuals
 
 class Communicator(BaseCommunicator):
 	'''Communicator which uses text files for 
      data exchange between a server and a client.'''
-	def __init__(self, fninput='evaluations.txt', fnoutput='individuals.txt'):
-		super(BaseCommunicator, self).__init__()
+	def __init__(self, fninput='evaluations.txt', fnoutput='individuals.txt', params=None):
+		super(Communicator, self).__init__(params=params)
 		self.fninput = fninput
 		self.fnoutput = fnoutput
 
@@ -14,16 +15,13 @@ class Communicator(BaseCommunicator):
 		with open(self.fninput, 'w') as finput:
 			finput.close()
 		foutput = open(self.fnoutput, 'w') 
-		for indiv in indivList:
-			foutput.write(str(indiv) + '\n')
+		foutput.write(''.join([ line + '\n' for line in self.fidelityLines() ]) + encodeIndividuals(indivList))
 		foutput.close()
 
 	def read(self):
 		while os.path.getsize(self.fninput) == 0:
 			time.sleep(0.05)
-		evaluations = []
 		finput = open(self.fninput, 'r')
-		for line in finput:
-			evaluations.append(line)
+		evaluations = finput.read().splitlines()
 		finput.close()
 		return evaluations
@@ -1,29 +1,71 @@
 import os
 from baseCommunicator import BaseCommunicator
+from textEncoding import encodeIndividuals
+from binaryFraming import packRequest, readResponse, evaluationLines
+from deltaEncoding import DeltaEncoder
 
 class Communicator(BaseCommunicator):
 	'''Communicator which uses unix pipes for 
-     data exchange between a server and a client'''
-	def __init__(self, fninput='/tmp/evaluations.pipe', fnoutput='/tmp/individuals.pipe'):
-		super(BaseCommunicator, self).__init__()
+     data exchange between a server and a client
+
+     Optional parameters:
+       protocol - 'text' (default), 'binary' (see
+         docs/communicators.binaryFraming) or 'delta' (text,
+         offspring are sent as changes to their parents, see
+         communicators/deltaEncoding.py)
+       deltaTableSize - number of genomes the server assumes
+         the client remembers in the delta protocol (default 1000)'''
+	def __init__(self, fninput='/tmp/evaluations.pipe', fnoutput='/tmp/individuals.pipe', params=None):
+		super(Communicator, self).__init__(params=params)
 		self.fninput = fninput
 		self.fnoutput = fnoutput
+		self.setParamDefault('protocol', 'text')
+		self.setParamDefault('deltaTableSize', 1000)
+		if not self.params['protocol'] in ['text', 'binary', 'delta']:
+			raise ValueError('Unknown protocol ' + self.params['protocol'] + ', must be text, binary or delta')
+		self.deltaEncoder = DeltaEncoder(self.params['deltaTableSize'])
 		try:
 			os.mkfifo(fninput)
 			os.mkfifo(fnoutput)
 		except OSError, e:
 			pass
 
-	def write(self, indivList):
-		foutput = open(self.fnoutput, 'w')
-		for indiv in indivList:
-			foutput.write(str(indiv) + '\n')
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toString'].add('protocol')
+		t['toInt'].add('deltaTableSize')
+		return t
+
+	def formatBatch(self, indivList):
+		'''Returns the string to be written into the pipe'''
+		if self.params['protocol'] == 'binary':
+			if not self.fidelity is None:
+				raise ValueError('Fidelity levels are not supported by the binary protocol')
+			return packRequest(0, indivList)
+		header = ''.join([ line + '\n' for line in self.fidelityLines() ])
+		if self.params['protocol'] == 'delta':
+			return header + ''.join([ line + '\n' for line in self.deltaEncoder.encode(indivList) ])
+		return header + encodeIndividuals(indivList)
+
+	def writeFormatted(self, data):
+		foutput = open(self.fnoutput, 'wb')
+		foutput.write(data)
 		foutput.close()
 
+	def write(self, indivList):
+		self.writeFormatted(self.formatBatch(indivList))
+
 	def read(self):
-		evaluations = []
+		if self.params['protocol'] == 'binary':
+			finput = open(self.fninput, 'rb')
+			try:
+				_, ids, scores = readResponse(finput)
+			except EOFError:
+				return [] # the client closed the pipe prematurely; the batch is resent
+			finally:
+				finput.close()
+			return evaluationLines(ids, scores)
 		finput = open(self.fninput, 'r')
-		for line in finput:
-			evaluations.append(line)
+		evaluations = finput.read().splitlines()
 		finput.close()
 		return evaluations
@@ -0,0 +1,194 @@
+import os
+import errno
+import shlex
+import atexit
+import subprocess
+import multiprocessing
+from asyncCommunicator import AsyncCommunicator
+
+def makeFifo(filename):
+	try:
+		os.mkfifo(filename)
+	except OSError, e:
+		if e.errno != errno.EEXIST:
+			raise
+
+class ClientProcess(object):
+	'''A client started and supervised by the worker pool. Each
+     client gets its own pair of pipes and talks to the server
+     using exactly the same protocol as with the unixPipe
+     communicator: it reads the genomes until EOF, then writes
+     the evaluations and closes the pipe.
+
+     A chunk of genomes goes through the following states:
+       idle -> connecting -> sending -> receiving -> idle
+     All I/O is nonblocking, so that a single select() loop can
+     serve all the clients at once.'''
+	def __init__(self, command, fninput, fnoutput):
+		self.command = command
+		self.fninput = fninput
+		self.fnoutput = fnoutput
+		makeFifo(fninput)
+		makeFifo(fnoutput)
+		self.process = None
+		self.consecutiveFailures = 0
+		self._reset()
+		self.start()
+
+	def _reset(self):
+		self.state = 'idle'
+		self.chunk = None
+		self.fd = None
+		self.outbuf = ''
+		self.inbuf = []
+
+	def _arguments(self):
+		args = shlex.split(self.command)
+		if not '{individuals}' in self.command and not '{evaluations}' in self.command:
+			return args + [self.fnoutput, self.fninput]
+		return [ a.replace('{individuals}', self.fnoutput).replace('{evaluations}', self.fninput) for a in args ]
+
+	def start(self):
+		self.process = subprocess.Popen(self._arguments(), close_fds=True) # the client must not inherit the pipes of the other clients
+
+	def stop(self):
+		if not self.process is None and self.alive():
+			self.process.terminate()
+			self.process.wait()
+
+	def alive(self):
+		return self.process.poll() is None
+
+	def fileno(self):
+		return self.fd
+
+	def wantsToRead(self):
+		return self.state == 'receiving'
+
+	def wantsToWrite(self):
+		return self.state == 'sending'
+
+	def submit(self, chunk, lines):
+		self.chunk = chunk
+		self.outbuf = ''.join([ line + '\n' for line in lines ])
+		self.state = 'connecting'
+
+	def tryConnecting(self):
+		'''Opening the FIFO for writing in nonblocking mode fails
+       with ENXIO until the client opens it for reading'''
+		try:
+			self.fd = os.open(self.fnoutput, os.O_WRONLY | os.O_NONBLOCK)
+		except OSError, e:
+			if e.errno == errno.ENXIO:
+				return
+			raise
+		self.state = 'sending'
+
+	def handleWritable(self):
+		try:
+			written = os.write(self.fd, self.outbuf)
+		except OSError, e:
+			if e.errno == errno.EAGAIN:
+				return
+			raise
+		self.outbuf = self.outbuf[written:]
+		if self.outbuf == '':
+			os.close(self.fd)
+			self.fd = os.open(self.fninput, os.O_RDONLY | os.O_NONBLOCK)
+			self.state = 'receiving'
+
+	def handleReadable(self):
+		'''The client writes all the evaluations at once and closes
+       the pipe, so the lines are returned upon EOF'''
+		data = os.read(self.fd, 65536)
+		if data != '':
+			self.inbuf.append(data)
+			return []
+		os.close(self.fd)
+		evaluations = ''.join(self.inbuf).splitlines()
+		self._reset()
+		self.consecutiveFailures = 0
+		return evaluations
+
+	def restart(self):
+		if not self.fd is None:
+			os.close(self.fd)
+		self._reset()
+		self.stop()
+		self.consecutiveFailures += 1
+		self.start()
+
+class Communicator(AsyncCommunicator):
+	'''Communicator which starts several clients by itself
+     and distributes the evaluations among them. Every
+     batch of Individuals is split into chunks, which are
+     handed out to the clients as they become idle; the
+     evaluations are matched to the Individuals by their
+     IDs. Clients which die are restarted and their chunks
+     are reassigned.
+
+     Each client communicates through its own pair of unix
+     pipes, named after the pipes passed to the constructor
+     with the client's number appended (e.g.
+     /tmp/individuals.pipe.0). The protocol is the same as
+     for unixPipe, so any client which works with unixPipe
+     will work here.
+
+     Required parameters:
+       clientCommand - command line starting one client. The
+         strings {individuals} and {evaluations} are replaced
+         with the names of the client's pipes. If neither is
+         present, the two names are appended to the command.
+     Optional parameters:
+       numWorkers - number of clients (default: number of CPUs)
+       chunkSize - number of Individuals sent to a client at
+         once (default: batch split evenly among the clients)
+       maxConsecutiveRestarts - a client which fails this many
+         times in a row is considered broken (default 5)'''
+	def __init__(self, fninput='/tmp/evaluations.pipe', fnoutput='/tmp/individuals.pipe', params=None):
+		super(Communicator, self).__init__(params=params)
+		self.fninput = fninput
+		self.fnoutput = fnoutput
+		self.setParamDefault('numWorkers', multiprocessing.cpu_count())
+		self.setParamDefault('maxConsecutiveRestarts', 5)
+
+	def requiredParametersTranslator(self):
+		t = super(Communicator, self).requiredParametersTranslator()
+		t['toString'].add('clientCommand')
+		return t
+
+	def optionalParametersTranslator(self):
+		t = super(Communicator, self).optionalParametersTranslator()
+		t['toInt'].update({'numWorkers', 'maxConsecutiveRestarts'})
+		return t
+
+	def _startClients(self):
+		for i in xrange(self.params['numWorkers']):
+			self.workers.append(ClientProcess(self.params['clientCommand'], self.fninput + '.' + str(i), self.fnoutput + '.' + str(i)))
+		atexit.register(self._stopClients)
+
+	def _stopClients(self):
+		for client in self.workers:
+			client.stop()
+
+	def _maintainWorkers(self):
+		if self.workers == []:
+			self._startClients() # started lazily, so that the clients are restarted after recovering from a backup
+		for client in self.workers:
+			if not client.alive():
+				self._fail(client, 'client exited')
+			elif client.state == 'connecting':
+				client.tryConnecting()
+
+	def _workerFailed(self, client, reason):
+		if client.consecutiveFailures >= self.params['maxConsecutiveRestarts']:
+			raise RuntimeError('Client ' + client.command + ' failed ' + str(client.consecutiveFailures) + ' times in a row, giving up')
+		print 'Client at ' + client.fnoutput + ' failed (' + reason + '), restarting'
+		client.restart()
+
+	def _workerStalled(self, client):
+		print 'Client at ' + client.fnoutput + ' is stuck with an evaluation which timed out, restarting'
+		client.restart()
+
+	def _selectTimeout(self):
+		return 0.01 if any([ c.state == 'connecting' for c in self.workers ]) else 0.1
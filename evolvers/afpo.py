@@ -2,22 +2,6 @@ import numpy as np
 from copy import deepcopy
 from baseEvolver import BaseEvolver
 
-def firstDominatedBySecond(indiv0, indiv1):
-	# truth table:
-	#              i0.f<i1.f    i0.f=i1.f    i0.f>i1.f
-	# i0.a<i1.a    F            F            F
-	# i0.a=i1.a    T            by ID        F
-	# i0.a>i1.a    T            T            F
-	if indiv0.id == indiv1.id:
-		raise RuntimeError('AFPO: Two individuals with the same ID compared')
-	if indiv0.score == indiv1.score:
-		if indiv0.age == indiv1.age:
-			return indiv0.id < indiv1.id
-		else:
-			return indiv0.age > indiv1.age
-	else:
-		return indiv0.score < indiv1.score and indiv0.age >= indiv1.age
-
 class Evolver(BaseEvolver):
 	'''AFPO (Age-Fitness Pareto Optimization) - evolutionary algorithm
      which uses age of individuals to maintain diversity. The age is
@@ -38,17 +22,8 @@ class Evolver(BaseEvolver):
 	def updatePopulation(self):
 		super(Evolver, self).updatePopulation()
 
-		# finding Pareto front
-		for indiv in self.population:
-			indiv.__dominated__ = False
-		for i in xrange(self.params['populationSize']):
-			for j in xrange(self.params['populationSize']):
-				if i != j and firstDominatedBySecond(self.population[i], self.population[j]):
-					self.population[i].__dominated__ = True
-		paretoFront = []
-		for indiv in self.population:
-			if not indiv.__dominated__:
-				paretoFront.append(indiv)
+		# finding Pareto front: the higher score and the lower age the better, equal ones are told apart by ID
+		paretoFront = self.findParetoFront(lambda x: -1*x.score, lambda x: x.age)
 
 		if self.params.has_key('printParetoFront') and self.params['printParetoFront'] == 'yes':
 			for indiv in paretoFront:
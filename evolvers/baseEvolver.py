@@ -38,6 +38,111 @@ def firstDominatedBySecond(indiv0, indiv1, func0, func1, breakTiesByIDs=True):
 	else:
 		return func0(indiv0) > func0(indiv1) and func1(indiv0) >= func1(indiv1)
 
+def _checkUniqueIDs(population):
+	ids = [ indiv.id for indiv in population ]
+	if len(set(ids)) != len(ids):
+		seen = {}
+		for indiv in population:
+			if seen.has_key(indiv.id):
+				raise RuntimeError('Pareto optimization error: Two individuals with the same ID compared:\n' + str(seen[indiv.id]) + '\n' + str(indiv))
+			seen[indiv.id] = indiv
+	return ids
+
+def nondominatedTwoObjectives(population, func0, func1, breakTiesByIDs=True):
+	'''Returns the list of booleans telling which Individuals of the
+     population are not dominated by any other one, the same as
+     comparing every pair with firstDominatedBySecond(), but in
+     O(N log N): the objectives are computed once per Individual,
+     the population is sorted by the first objective and the second
+     one is swept in that order'''
+	ids = _checkUniqueIDs(population)
+	values0 = [ func0(indiv) for indiv in population ]
+	values1 = [ func1(indiv) for indiv in population ]
+	# within the same value of the first objective the best second objective goes first, and among the exact ties the highest ID
+	order = sorted(xrange(len(population)), key=lambda i: (values0[i], values1[i], -ids[i]))
+	nondominated = [False]*len(population)
+	bestBefore = None # lowest second objective among the lower values of the first one
+	start = 0
+	while start < len(order):
+		end = start
+		while end < len(order) and values0[order[end]] == values0[order[start]]:
+			end += 1
+		bestHere = values1[order[start]]
+		for k in xrange(start, end):
+			i = order[k]
+			if not bestBefore is None and bestBefore <= values1[i]:
+				continue
+			if values1[i] > bestHere or (breakTiesByIDs and k > start):
+				continue
+			nondominated[i] = True
+		if bestBefore is None or bestHere < bestBefore:
+			bestBefore = bestHere
+		start = end
+	return nondominated
+
+maxComparisonElements = 1 << 22 # bounds the memory taken by a block of comparisons in dominatedRows()
+
+def objectiveMatrix(population, functions):
+	'''Returns the N x M array of the values of the M
+     objectives for the N Individuals'''
+	return np.array([ [ func(indiv) for func in functions ] for indiv in population ], dtype=np.float64).reshape((len(population), len(functions)))
+
+def dominatedRows(objectives, ids, breakTiesByIDs=True, candidates=None):
+	'''Returns the boolean array telling which rows of the objective
+     matrix are dominated by some other row (all objectives minimized),
+     with the same semantics as firstDominatedBySecondManyObjectives().
+     Only the rows selected by the boolean array candidates take part
+     in the comparisons if it is given.
+
+     A row can only be dominated by the rows which precede it in the
+     lexicographic order (among the exact ties, the higher IDs go
+     first), and a dominated row is always dominated by some row of
+     the front. The rows are thus taken in that order, in blocks, and
+     compared only to the front found so far and to their own block;
+     at most maxComparisonElements values are compared at once.'''
+	ids = np.asarray(ids, dtype=np.int64)
+	indices = np.arange(len(objectives)) if candidates is None else np.flatnonzero(candidates)
+	keys = (-ids[indices],) + tuple(objectives[indices].T[::-1])
+	order = indices[np.lexsort(keys)] if len(indices) > 0 else indices
+	numObjectives = max(1, objectives.shape[1])
+	dominated = np.zeros(len(objectives), dtype=bool)
+	front = np.empty((0, objectives.shape[1]), dtype=objectives.dtype)
+	frontIDs = np.empty(0, dtype=np.int64)
+	start = 0
+	while start < len(order):
+		# the comparisons within the block grow with its square, the ones with the front linearly
+		blockSize = max(1, min(max(64, len(front)), maxComparisonElements // (numObjectives*(2*len(front) + 64))))
+		block = order[start:start+blockSize]
+		rows = objectives[block]
+		others = np.concatenate((front, rows))
+		otherIDs = np.concatenate((frontIDs, ids[block]))
+		notBetter = np.ones((len(block), len(others)), dtype=bool)
+		worse = np.zeros((len(block), len(others)), dtype=bool)
+		for k in xrange(objectives.shape[1]):
+			notBetter &= rows[:,k,np.newaxis] >= others[np.newaxis,:,k]
+			worse |= rows[:,k,np.newaxis] > others[np.newaxis,:,k]
+		dominatedHere = notBetter & worse
+		if breakTiesByIDs:
+			dominatedHere |= notBetter & ~worse & (ids[block][:,np.newaxis] < otherIDs[np.newaxis,:])
+		blockDominated = dominatedHere.any(axis=1)
+		dominated[block] = blockDominated
+		front = np.concatenate((front, rows[~blockDominated]))
+		frontIDs = np.concatenate((frontIDs, ids[block][~blockDominated]))
+		start += blockSize
+	return dominated
+
+def nondominatedRanks(objectives, ids, breakTiesByIDs=True):
+	'''Returns the array of the nondominated ranks of the rows of the
+     objective matrix: 0 for the Pareto front, 1 for the front of the
+     rest and so on'''
+	ranks = np.full(len(objectives), -1, dtype=np.int64)
+	rank = 0
+	while np.any(ranks < 0):
+		remaining = ranks < 0
+		ranks[remaining & ~dominatedRows(objectives, ids, breakTiesByIDs=breakTiesByIDs, candidates=remaining)] = rank
+		rank += 1
+	return ranks
+
 def firstStochasticallyDominatedBySecond(indiv0, indiv1, func0, func1, secondObjProb):
 	if np.random.random() > secondObjProb:
 		if func0(indiv0) > func0(indiv1):
@@ -54,6 +159,39 @@ def firstStochasticallyDominatedBySecond(indiv0, indiv1, func0, func1, secondObj
 		else:
 			return False
 
+def stochasticallyDominated(population, func0, func1, secondObjProb):
+	'''Returns the boolean array telling which Individuals are dominated
+     according to firstStochasticallyDominatedBySecond() by some other
+     Individual. Makes the same random draws in the same order as
+     comparing every ordered pair of different Individuals in turn, so
+     the results are identical for the same seed. The draws are made
+     for blocks of rows at once, so that at most maxComparisonElements
+     pairs are compared at a time.'''
+	n = len(population)
+	ids = np.array([ indiv.id for indiv in population ], dtype=np.int64)
+	values0 = np.array([ func0(indiv) for indiv in population ])
+	values1 = np.array([ func1(indiv) for indiv in population ])
+	dominated = np.zeros(n, dtype=bool)
+	blockSize = max(1, maxComparisonElements // max(1, n))
+	for start in xrange(0, n, blockSize):
+		rows = np.arange(start, min(n, start + blockSize))
+		otherPairs = np.ones((len(rows), n), dtype=bool)
+		otherPairs[np.arange(len(rows)), rows] = False
+		draws = np.ones((len(rows), n)) # the diagonal is masked by otherPairs
+		draws[otherPairs] = np.random.random(len(rows)*(n - 1)) # row after row, skipping the diagonal
+		byBothObjectives = otherPairs & (draws <= secondObjProb)
+		sameIDs = byBothObjectives & (ids[rows][:,np.newaxis] == ids[np.newaxis,:])
+		if sameIDs.any():
+			i, j = np.argwhere(sameIDs)[0]
+			raise RuntimeError('Pareto optimization error: Two individuals with the same ID compared:\n' + str(population[rows[i]]) + '\n' + str(population[j]))
+		f0, other0 = values0[rows][:,np.newaxis], values0[np.newaxis,:]
+		f1, other1 = values1[rows][:,np.newaxis], values1[np.newaxis,:]
+		older = ids[rows][:,np.newaxis] < ids[np.newaxis,:] # lower ID indicates that the individual was generated before the other one and is older
+		byFitness = (f0 > other0) | ((f0 == other0) & older)
+		byPareto = ((f0 == other0) & (((f1 == other1) & older) | (f1 > other1))) | ((f0 > other0) & (f1 >= other1))
+		dominated[rows] = np.where(byBothObjectives, byPareto, otherPairs & byFitness).any(axis=1)
+	return dominated
+
 class BaseEvolver(object):
 	'''Base class for evolutionary algorithms. Provides
      methods for creating server output.'''
@@ -63,6 +201,7 @@ class BaseEvolver(object):
 		self.indivParams = indivParams
 		self.logHeaderWritten = False
 		self.generation = 0
+		self.objectiveCache = {}
 		if self.params.has_key('randomSeed'):
 			np.random.seed(self.params['randomSeed'])
 		if self.paramIsEnabled('trackAncestry'):
@@ -100,6 +239,7 @@ class BaseEvolver(object):
 	def updatePopulation(self):
 		self.generation += 1
 		self._setGlobalGenerationCounter()
+		self.objectiveCache = {}
 		if self.params.has_key('genStopAfter') and self.generation > self.params['genStopAfter']:
 			self.done()
 
@@ -142,6 +282,7 @@ class BaseEvolver(object):
 	def recover(self):
 		map(lambda x: x.recoverID(), self.population)   # make sure that we start from the next free ID
 		np.random.set_state(self.randomGeneratorState)
+		self.objectiveCache = {} # the IDs of the individuals dropped before the backup may be reused
 		self._createGlobalGenerationCounter()
 		self._setGlobalGenerationCounter()
 		if self.paramIsEnabled('logBestIndividual'):
@@ -225,33 +366,41 @@ class BaseEvolver(object):
 		# The optional parameters are useful for bruteforce search algorithms
 		if population is None:
 			population = self.population
-		for indiv in population:
-			indiv.__dominated__ = False
-		for ii in population:
-			for ij in population:
-				if not ii is ij and firstDominatedBySecond(ii, ij, func0, func1, breakTiesByIDs=breakTiesByIDs):
-					ii.__dominated__ = True
+		for indiv, nondominated in zip(population, nondominatedTwoObjectives(population, func0, func1, breakTiesByIDs=breakTiesByIDs)):
+			indiv.__dominated__ = not nondominated
 		paretoFront = filter(lambda x: not x.__dominated__, population)
 		return paretoFront
 
 	def findParetoFrontManyObjectives(self, funcs, breakTiesByIDs=True, population=None):
-		for indiv in self.population:
-			indiv.__dominated__ = False
-		for ii in self.population:
-			for ij in self.population:
-				if not ii is ij and firstDominatedBySecondManyObjectives(ii, ij, funcs):
-#				if not ii is ij and firstStochasticallyDominatedBySecondManyObjectives(ii, ij, funcs, self.params['secondObjectiveProbability']):
-					ii.__dominated__ = True
-		paretoFront = filter(lambda x: not x.__dominated__, self.population)
+		if population is None:
+			population = self.population
+		ids = _checkUniqueIDs(population)
+		dominated = dominatedRows(objectiveMatrix(population, funcs), ids, breakTiesByIDs=breakTiesByIDs)
+		for indiv, isDominated in zip(population, dominated.tolist()):
+			indiv.__dominated__ = isDominated
+		paretoFront = filter(lambda x: not x.__dominated__, population)
 		return paretoFront
 
+	def findParetoRanksManyObjectives(self, funcs, breakTiesByIDs=True, population=None):
+		'''Returns the list of the nondominated fronts of the population,
+       the Pareto front first. Every Individual gets its rank as
+       indiv.paretoRank.'''
+		if population is None:
+			population = self.population
+		ids = _checkUniqueIDs(population)
+		ranks = nondominatedRanks(objectiveMatrix(population, funcs), ids, breakTiesByIDs=breakTiesByIDs).tolist()
+		fronts = [ [] for _ in xrange(max(ranks) + 1 if ranks else 0) ]
+		for indiv, rank in zip(population, ranks):
+			indiv.paretoRank = rank
+			fronts[rank].append(indiv)
+		return fronts
+
 	def findStochasticalParetoFront(self, func0, func1):
-		for indiv in self.population:
-			indiv.__dominated__ = False
-		for ii in self.population:
-			for ij in self.population:
-				if not ii is ij and firstStochasticallyDominatedBySecond(ii, ij, func0, func1, self.params['secondObjectiveProbability']):
-					ii.__dominated__ = True
+		if self.population == []:
+			return []
+		dominated = stochasticallyDominated(self.population, func0, func1, self.params['secondObjectiveProbability'])
+		for indiv, isDominated in zip(self.population, dominated.tolist()):
+			indiv.__dominated__ = isDominated
 #		for string in [ '{}, {} : {}'.format(str(indiv), str(indiv.score), str(indiv.__dominated__)) for indiv in self.population ]:
 #			print(string)
 #		print('')
@@ -337,6 +486,26 @@ class BaseEvolver(object):
 		pairStrs = [ '\'' + key + '\': ' + str(dict[key]) for key in sorted(dict.keys()) ]
 		return '{' + ','.join(pairStrs) + '}'
 
+	def cachedObjective(self, name, func):
+		'''Returns a version of func which is computed only once per
+       Individual per generation. For the objectives which depend on
+       the genome only, e.g. the connection cost: the values are kept
+       by ID, and an Individual gets a new ID whenever its genome
+       changes.'''
+		values = self.objectiveCache.setdefault(name, {})
+		def cachedFunc(indiv):
+			if not values.has_key(indiv.id):
+				values[indiv.id] = func(indiv)
+			return values[indiv.id]
+		return cachedFunc
+
+	def evaluateAtFidelity(self, indivList, fidelity):
+		'''Evaluates the Individuals at the given fidelity level of the
+       client (see docs/communicators.baseCommunicator), None is the
+       full fidelity. Every Individual gets the level of its score
+       as indiv.scoreFidelity.'''
+		return self.communicator.evaluate(indivList, fidelity=fidelity)
+
 	def noisifyAllScores(self):
 		for indiv in self.population:
 			indiv.noisifyScore(self.params['noiseAmplitude'])
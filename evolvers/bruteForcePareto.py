@@ -1,6 +1,9 @@
 from copy import deepcopy
 from baseEvolver import BaseEvolver
 
+def firstMinObj(indiv):
+	return -1*indiv.score
+
 def _appendCopyToParetoFront(object, indiv):
 	object.paretoFront.append(deepcopy(indiv))
 
@@ -36,25 +39,23 @@ class Evolver(BaseEvolver):
 
 		if not self.params.has_key('secondMinObj'):
 			print 'WARNING! The second objective function is undefined, falling back to constant'
-			(lambda x: sum(map(lambda y: 1 if y else 0, x.mask))) = lambda x: 0
+			self.params['secondMinObj'] = lambda x: 0
 		if not hasattr(self, '__secondObjName__'):
 			self.__secondObjName__ = 'unknown'
 
-		(lambda x: -1*x.score) = lambda x: -1*x.score
-
 		indiv = self.params['indivClass'](indivParams)
 		indiv.setValuesToTheFirstSet()
 
 		self.nextIndiv = self._addSpaceChunk(indiv, self.params['bruteForceChunkSize'])
 		self.communicator.evaluate(self.population)
 
-		self.paretoFront = self.findParetoFront((lambda x: -1*x.score), (lambda x: sum(map(lambda y: 1 if y else 0, x.mask))), breakTiesByIDs=self.params['paretoBreakTiesByIDs'])
+		self.paretoFront = self.findParetoFront(firstMinObj, self.getSecondMinObj(), breakTiesByIDs=self.params['paretoBreakTiesByIDs'])
 
 		self.fullParetoFront = self.paretoFront
 		self.paretoFront = []
 		self._getObjPairs(self.fullParetoFront, firstOccurenceAction=_appendCopyToParetoFront)
 
-		self.fullParetoFront.sort(key = (lambda x: sum(map(lambda y: 1 if y else 0, x.mask))))
+		self.fullParetoFront.sort(key = self.getSecondMinObj())
 
 		self._outputPareto()
 
@@ -64,10 +65,15 @@ class Evolver(BaseEvolver):
 		t['toBool'].add('paretoBreakTiesByIDs')
 		return t
 
+	def getSecondMinObj(self):
+		'''The second objective is computed once per individual per generation'''
+		return self.cachedObjective('secondMinObj', self.params['secondMinObj'])
+
 	def _getObjPairs(self, subpop, firstOccurenceAction=None):
 		objpairs = set()
+		secondMinObj = self.getSecondMinObj()
 		for indiv in subpop:
-			objpair = ((lambda x: -1*x.score)(indiv), (lambda x: sum(map(lambda y: 1 if y else 0, x.mask)))(indiv))
+			objpair = (firstMinObj(indiv), secondMinObj(indiv))
 			if firstOccurenceAction and not objpair in objpairs:
 				firstOccurenceAction(self, indiv)
 			objpairs.add(objpair)
@@ -92,10 +98,10 @@ class Evolver(BaseEvolver):
 
 	def _outputPareto(self):
 		self.logParetoFront(self.fullParetoFront)
-		self.printParetoFront(self.fullParetoFront, self.__secondObjName__, (lambda x: sum(map(lambda y: 1 if y else 0, x.mask))))
+		self.printParetoFront(self.fullParetoFront, self.__secondObjName__, self.getSecondMinObj())
 
 		print "Short Pareto front:"
-		self.printParetoFront(self.paretoFront, self.__secondObjName__, (lambda x: sum(map(lambda y: 1 if y else 0, x.mask))))
+		self.printParetoFront(self.paretoFront, self.__secondObjName__, self.getSecondMinObj())
 
 	def updatePopulation(self):
 		super(Evolver, self).updatePopulation()
@@ -108,18 +114,17 @@ class Evolver(BaseEvolver):
 		self.nextIndiv = self._addSpaceChunk(self.nextIndiv, self.params['bruteForceChunkSize'])
 		self.communicator.evaluate(self.population)
 
-		self.paretoFront += self.findParetoFront((lambda x: -1*x.score),
-																						(lambda x: sum(map(lambda y: 1 if y else 0, x.mask))),
-																						breakTiesByIDs=self.params['paretoBreakTiesByIDs'])
+		secondMinObj = self.getSecondMinObj()
+		self.paretoFront += self.findParetoFront(firstMinObj, secondMinObj,
+		                                         breakTiesByIDs=self.params['paretoBreakTiesByIDs'])
 
-		self.paretoFront = self.findParetoFront((lambda x: -1*x.score),
-																						(lambda x: sum(map(lambda y: 1 if y else 0, x.mask))),
-																						breakTiesByIDs=self.params['paretoBreakTiesByIDs'],
-																						population=self.paretoFront)
+		self.paretoFront = self.findParetoFront(firstMinObj, secondMinObj,
+		                                        breakTiesByIDs=self.params['paretoBreakTiesByIDs'],
+		                                        population=self.paretoFront)
 
 		newObjPairs = self._getObjPairs(self.paretoFront)
 		for indiv in self.fullParetoFront:
-			objpair = ((lambda x: -1*x.score)(indiv), (lambda x: sum(map(lambda y: 1 if y else 0, x.mask)))(indiv))
+			objpair = (firstMinObj(indiv), secondMinObj(indiv))
 			if objpair in newObjPairs and not indiv in self.paretoFront:
 				self.paretoFront.append(indiv)
 
@@ -127,5 +132,5 @@ class Evolver(BaseEvolver):
 		self.paretoFront = []
 		self._getObjPairs(self.fullParetoFront, firstOccurenceAction=_appendCopyToParetoFront)
 
-		self.fullParetoFront.sort(key = (lambda x: sum(map(lambda y: 1 if y else 0, x.mask))))
+		self.fullParetoFront.sort(key = secondMinObj)
 		self._outputPareto()
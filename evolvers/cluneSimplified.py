@@ -1,6 +1,7 @@
 import numpy as np
 from copy import deepcopy
 from baseEvolver import BaseEvolver
+from paretoArchive import ParetoArchive
 
 class Evolver(BaseEvolver):
 	'''Multiobjective algorithm which minimizes the connection cost alongside
@@ -32,11 +33,36 @@ class Evolver(BaseEvolver):
          fields to zero to count nonzero values.
        evolParams['noiseAmplitude'] - if provided, noisy evaluations with a
 			  uniformly distributed noise of given amplitude will be simulated.
+       evolParams['multiFidelity'] - evaluate the offspring at the low
+         fidelity level of the client first (e.g. with a shorter simulation)
+         and reevaluate at full fidelity only the ones which make it into
+         the Pareto front, until the front consists of fully evaluated
+         individuals. Requires a client which understands the fidelity
+         levels, see docs/communicators.baseCommunicator.
+       evolParams['lowFidelity'] - the fidelity level for the offspring
+         (default 0).
+       evolParams['fidelityMargin'] - how much the full fidelity score may
+         exceed the low fidelity one. Low fidelity scores are increased by
+         this margin when the Pareto front is computed, so that the promising
+         individuals get reevaluated rather than dropped (default 0).
+       evolParams['paretoArchiveSize'] - if provided, the Pareto front is
+         kept at most this large: whenever it grows beyond the size, it is
+         thinned out with a ParetoArchive (see evolvers/paretoArchive.py),
+         which keeps its members spread evenly along the front. This leaves
+         at least populationSize - paretoArchiveSize places for the offspring
+         in every generation. The archive keeps only the individuals which
+         are nondominated by both objectives, so the option requires
+         secondObjectiveProbability of 1: a stochastic front would be cut
+         down to its deterministic part.
 
      NOTE: Individual classes with surefire mutation operator are OK.'''
 
 	def __init__(self, communicator, indivParams, evolParams, initialPopulationFileName = None):
 		super(Evolver, self).__init__(communicator, indivParams, evolParams, initialPopulationFileName=initialPopulationFileName)
+		if self.paramExists('paretoArchiveSize') and not 0 < self.params['paretoArchiveSize'] < self.params['populationSize']:
+			raise ValueError('paretoArchiveSize must be positive and smaller than populationSize')
+		if self.paramExists('paretoArchiveSize') and self.paramExists('secondObjectiveProbability') and self.params['secondObjectiveProbability'] != 1.:
+			raise ValueError('paretoArchiveSize requires secondObjectiveProbability of 1')
 		if self.params['initialPopulationType'] == 'random':
 			while len(self.population) < self.params['populationSize']:
 				indiv = self.getRandomIndividual()
@@ -57,7 +83,7 @@ class Evolver(BaseEvolver):
 			raise ValueError('Wrong type of initial population')
 		self.communicator.evaluate(self.population)
 		self.population.sort(key = lambda x: x.score)
-		self.paretoFront = self.getCluneParetoFront()
+		self.paretoFront = self.boundParetoFront(self.getCluneParetoFront())
 
 		self.paretoSizeHeaderWritten = False
 
@@ -79,20 +105,29 @@ class Evolver(BaseEvolver):
 	def optionalParametersTranslator(self):
 		t = super(Evolver, self).optionalParametersTranslator()
 		t['toFloat'].remove('secondObjectiveProbability')
-		t['toBool'].add('useMaskForSparsity')
+		t['toBool'].update({'useMaskForSparsity', 'multiFidelity'})
+		t['toInt'].add('lowFidelity')
+		t['toFloat'].add('fidelityMargin')
+		t['toInt'].add('paretoArchiveSize')
 		return t
 
 	def getConnectionCostFunc(self):
 		if self.paramIsEnabled('useMaskForSparsity'):
 			connectionCostFunc = lambda x: len(filter(lambda y: y, x.mask))
 		else:
-			connectionCostFunc = lambda x: len(filter(lambda y: y!=0, x.values))
+			connectionCostFunc = lambda x: x.countNonzeroValues()
 		self.secondObjectiveLabel = 'connection cost'
-		return connectionCostFunc
+		return self.cachedObjective('connectionCost', connectionCostFunc)
 
 	def getErrorFunc(self):
+		if self.paramIsEnabled('multiFidelity'):
+			margin = self.params['fidelityMargin'] if self.paramExists('fidelityMargin') else 0.
+			return lambda x: -1.*(x.score + (0. if self._hasFullFidelityScore(x) else margin))
 		return lambda x: -1.*x.score
 
+	def _hasFullFidelityScore(self, indiv):
+		return getattr(indiv, 'scoreFidelity', None) is None
+
 	def getCluneParetoFront(self):
 		errorFunc = self.getErrorFunc()
 		connectionCostFunc = self.getConnectionCostFunc()
@@ -138,9 +173,41 @@ class Evolver(BaseEvolver):
 			child.mutate()
 			self.processMutatedChild(child, parent)
 			newPopulation.append(child)
-		self.communicator.evaluate(newPopulation)
+		if self.paramIsEnabled('multiFidelity'):
+			self.evaluateAtFidelity(newPopulation, self.params['lowFidelity'] if self.paramExists('lowFidelity') else 0)
+		else:
+			self.communicator.evaluate(newPopulation)
 		self.population = newPopulation + self.paretoFront
 		if self.paramExists('noiseAmplitude'):
 			self.noisifyAllScores()
 		self.population.sort(key = lambda x: x.score)
 		self.paretoFront = self.getCluneParetoFront()
+		if self.paramIsEnabled('multiFidelity'):
+			self.promoteParetoFront()
+		self.paretoFront = self.boundParetoFront(self.paretoFront)
+
+	def boundParetoFront(self, paretoFront):
+		'''Thins out the Pareto front if it is larger than paretoArchiveSize,
+       keeping the order of the remaining individuals'''
+		if not self.paramExists('paretoArchiveSize') or len(paretoFront) <= self.params['paretoArchiveSize']:
+			return paretoFront
+		archive = ParetoArchive(self.params['paretoArchiveSize'], self.getErrorFunc(), self.getConnectionCostFunc())
+		for indiv in paretoFront:
+			archive.insert(indiv)
+		kept = set([ id(indiv) for indiv in archive.contents() ])
+		return [ indiv for indiv in paretoFront if id(indiv) in kept ]
+
+	def promoteParetoFront(self):
+		'''Reevaluates the members of the Pareto front which have low
+       fidelity scores at full fidelity and recomputes the front,
+       until it consists of the fully evaluated Individuals only'''
+		while True:
+			promoted = [ indiv for indiv in self.paretoFront if not self._hasFullFidelityScore(indiv) ]
+			if promoted == []:
+				return
+			self.evaluateAtFidelity(promoted, None)
+			if self.paramExists('noiseAmplitude'):
+				for indiv in promoted:
+					indiv.noisifyScore(self.params['noiseAmplitude'])
+			self.population.sort(key = lambda x: x.score)
+			self.paretoFront = self.getCluneParetoFront()
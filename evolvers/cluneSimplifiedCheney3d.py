@@ -3,9 +3,13 @@ import __builtin__
 from cluneSimplified import Evolver as CluneSimplifiedEvolver
 
 class Evolver(CluneSimplifiedEvolver):
-	'''Three-dimensional dragon, first of its kind'''
-#	def __init__(self, communicator, indivParams, evolParams, initialPopulationFileName = None):
-#		super(Evolver, self).__init__(communicator, indivParams, evolParams, initialPopulationFileName=initialPopulationFileName)
+	'''Three-dimensional dragon, first of its kind.
+     Does not support evolParams['paretoArchiveSize']: the archive
+     thins out the front by two objectives only.'''
+	def __init__(self, communicator, indivParams, evolParams, initialPopulationFileName = None):
+		if 'paretoArchiveSize' in evolParams:
+			raise ValueError('paretoArchiveSize is not supported by the three-objective evolver')
+		super(Evolver, self).__init__(communicator, indivParams, evolParams, initialPopulationFileName=initialPopulationFileName)
 
 	def getMorphologicalAge(self):
 		return lambda x: __builtin__.globalGenerationCounter - x.timeOfLastMorphologicalMutation
@@ -52,6 +52,6 @@ class Evolver(CluneSimplified):
 		return indiv
 
 	def getConnectionCostFunc(self):
-		connectionCostFunc = lambda x: len(filter(lambda y: y!=0, x.parts[1].values))
+		connectionCostFunc = lambda x: x.parts[1].countNonzeroValues()
 		self.secondObjectiveLabel = 'connection cost of the controller'
-		return connectionCostFunc
+		return self.cachedObjective('connectionCost', connectionCostFunc)
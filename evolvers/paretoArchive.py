@@ -0,0 +1,168 @@
+'''Bounded archive of nondominated Individuals for two minimized objectives.
+   Not an Evolver: used by the evolvers which need to keep their Pareto fronts
+   at a fixed size (see cluneSimplified).
+
+   The archive keeps its members sorted by the first objective, so that with
+   both objectives minimized the second one decreases along the list. The
+   list is split into blocks of at most blockSize members, with the first
+   member of every block indexed. A new Individual is placed with two binary
+   searches, checked against its predecessor and removes the members it
+   dominates, which follow it in the list. Insertions and removals move only
+   the members of one block and the index entries, so an insert costs
+   O(log N) comparisons and O(blockSize + N/blockSize) moves of references,
+   not counting the removed members.
+
+   As long as the archive fits into its size it holds the exact Pareto front,
+   with ties broken by ID as in baseEvolver.firstDominatedBySecond(). Once it
+   grows beyond the size, the objective space is divided into boxes
+   (epsilon-dominance, 2002 Laumanns Thiele Deb Zitzler "Combining convergence
+   and diversity in evolutionary multiobjective optimization"): every box keeps
+   at most one Individual, the one closest to its best corner, and the boxes
+   dominated by other boxes are dropped. The boxes start at 1/size of the
+   ranges of the objectives and grow by a quarter until the archive fits,
+   which keeps the members spread evenly along the front.'''
+
+from bisect import bisect_left, bisect_right
+
+class ParetoArchive(object):
+	blockSize = 256
+
+	def __init__(self, maxSize, func0, func1):
+		self.maxSize = maxSize
+		self.funcs = (func0, func1)
+		self.epsilons = None # exact front until the archive overflows
+		self._clear()
+
+	def _clear(self):
+		self.firsts = [] # first box of every block
+		self.boxes0 = [] # blocks of the boxes of the members by the first objective
+		self.boxes1 = [] # same for the second objective
+		self.members = [] # blocks of entries (values, Individual)
+		self.size = 0
+
+	def _values(self, indiv):
+		return tuple([ func(indiv) for func in self.funcs ])
+
+	def _box(self, values):
+		if self.epsilons is None:
+			return values
+		return tuple([ v//e if e > 0 else v for v, e in zip(values, self.epsilons) ])
+
+	def _betterInBox(self, first, second):
+		'''True if the Individual first should represent the box
+       rather than second'''
+		(values0, indiv0), (values1, indiv1) = first, second
+		if values0 != values1:
+			if all([ a <= b for a, b in zip(values0, values1) ]):
+				return True
+			if all([ a >= b for a, b in zip(values0, values1) ]):
+				return False
+			if not self.epsilons is None:
+				distance0 = self._cornerDistance(values0)
+				distance1 = self._cornerDistance(values1)
+				if distance0 != distance1:
+					return distance0 < distance1
+		return indiv0.id > indiv1.id # lower ID indicates that the individual was generated before and is older
+
+	def _cornerDistance(self, values):
+		box = self._box(values)
+		return sum([ ((v - b*e)/e)**2 for v, b, e in zip(values, box, self.epsilons) if e > 0 ])
+
+	def insert(self, indiv):
+		'''Adds the Individual unless it is dominated by a member,
+       removing the members it dominates. Returns True if the
+       Individual was added.'''
+		entry = (self._values(indiv), indiv)
+		if not self._insertEntry(entry):
+			return False
+		if self.size <= self.maxSize:
+			return True
+		while self.size > self.maxSize:
+			self._coarsen()
+		block, pos = self._locate(self._box(entry[0])[0])
+		return pos < len(self.members[block]) and self.members[block][pos][1] is indiv
+
+	def _locate(self, box0):
+		'''Returns the block and the position in it of the first member
+       whose first box is not below box0. The position may be the
+       end of the block. Requires a nonempty archive.'''
+		block = max(bisect_right(self.firsts, box0) - 1, 0)
+		return block, bisect_left(self.boxes0[block], box0)
+
+	def _insertEntry(self, entry):
+		box0, box1 = self._box(entry[0])
+		if self.size == 0:
+			self.firsts, self.boxes0, self.boxes1, self.members = [box0], [[box0]], [[box1]], [[entry]]
+			self.size = 1
+			return True
+		block, pos = self._locate(box0)
+		boxes0, boxes1, members = self.boxes0[block], self.boxes1[block], self.members[block]
+		if pos < len(boxes0) and boxes0[pos] == box0:
+			if boxes1[pos] == box1:
+				if not self._betterInBox(entry, members[pos]):
+					return False
+				members[pos] = entry
+				return True
+			if boxes1[pos] < box1:
+				return False
+		elif pos > 0 and boxes1[pos-1] <= box1:
+			return False
+		# the members which follow have larger first boxes, those with no smaller second one are dominated
+		end = pos
+		while end < len(boxes1) and boxes1[end] >= box1:
+			end += 1
+		if end == len(boxes1):
+			self._removeFromNextBlocks(block + 1, box1)
+		self.size += 1 - (end - pos)
+		boxes0[pos:end] = [box0]
+		boxes1[pos:end] = [box1]
+		members[pos:end] = [entry]
+		self.firsts[block] = boxes0[0]
+		if len(boxes0) > self.blockSize:
+			self._split(block)
+		return True
+
+	def _removeFromNextBlocks(self, block, box1):
+		'''Removes the members with the second box not below box1
+       from the start of the blocks beginning with block'''
+		while block < len(self.boxes1):
+			boxes1 = self.boxes1[block]
+			end = 0
+			while end < len(boxes1) and boxes1[end] >= box1:
+				end += 1
+			self.size -= end
+			if end < len(boxes1):
+				if end > 0:
+					del self.boxes0[block][:end], boxes1[:end], self.members[block][:end]
+					self.firsts[block] = self.boxes0[block][0]
+				return
+			del self.firsts[block], self.boxes0[block], self.boxes1[block], self.members[block]
+
+	def _split(self, block):
+		half = len(self.boxes0[block])//2
+		for blocks in (self.boxes0, self.boxes1, self.members):
+			blocks.insert(block + 1, blocks[block][half:])
+			del blocks[block][half:]
+		self.firsts.insert(block + 1, self.boxes0[block + 1][0])
+
+	def _entries(self):
+		return [ entry for members in self.members for entry in members ]
+
+	def _coarsen(self):
+		entries = self._entries()
+		if self.epsilons is None:
+			self.epsilons = tuple([ float(max([ e[0][k] for e in entries ]) - min([ e[0][k] for e in entries ]))/self.maxSize for k in xrange(2) ])
+		else:
+			self.epsilons = tuple([ 1.25*e for e in self.epsilons ])
+		if all([ e == 0 for e in self.epsilons ]):
+			raise RuntimeError('Pareto archive cannot hold ' + str(len(entries)) + ' individuals with identical objectives in ' + str(self.maxSize) + ' places')
+		self._clear()
+		for entry in entries:
+			self._insertEntry(entry)
+
+	def contents(self):
+		'''Returns the list of the members, sorted by the first objective'''
+		return [ indiv for _, indiv in self._entries() ]
+
+	def __len__(self):
+		return self.size
@@ -40,11 +40,12 @@ if evolParams.has_key('randomSeed'):
 	print('WARNING: CLI supplied random seed overriden by the one supplied in the config file. New value: ' + str(evolParams['randomSeed']))
 else:
 	evolParams['randomSeed'] = int(cliArgs.randSeed)
+commParams = loadDict(conf, 'commParams') if conf.has_section('commParams') else {}
 
 # Creating communicator and evolver objects
 # This causes the initial population to be evaluated
 
-comm = Communicator(cliArgs.evalsFileName, cliArgs.indivFileName)
+comm = Communicator(cliArgs.evalsFileName, cliArgs.indivFileName, params=commParams)
 
 initialPopulationFileName = None if not evolParams.has_key('initialPopulationFile') else evolParams['initialPopulationFile']
 evolver = Evolver(comm, indivParams, evolParams, initialPopulationFileName=initialPopulationFileName)
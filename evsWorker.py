@@ -0,0 +1,38 @@
+#!/usr/bin/python2
+
+# Connects an ordinary client (one which works with the unixPipe communicator)
+# to a server running the tcpBroker communicator. Run one evsWorker.py and one
+# client per evaluation slot on every machine.
+
+import os
+import socket
+import argparse
+
+from communicators.batchFraming import readBatch, writeBatch
+
+cliParser = argparse.ArgumentParser(description='Bridge between a tcpBroker EVS server and a local unixPipe-style client')
+cliParser.add_argument('server', metavar='server', type=str, help='host:port of the tcpBroker')
+cliParser.add_argument('evalsFileName', metavar='evalsFileName', type=str, help="pipe from which the local client's evaluations are read")
+cliParser.add_argument('indivFileName', metavar='indivFileName', type=str, help='pipe to which the genomes are written for the local client')
+cliArgs = cliParser.parse_args()
+
+for fn in [cliArgs.evalsFileName, cliArgs.indivFileName]:
+	if not os.path.exists(fn):
+		os.mkfifo(fn)
+
+host, port = cliArgs.server.rsplit(':', 1)
+connection = socket.create_connection((host, int(port)))
+connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+fromServer = connection.makefile('r')
+toServer = connection.makefile('w')
+
+while True:
+	try:
+		batchID, genomes = readBatch(fromServer, replyStream=toServer)
+	except EOFError:
+		break
+	with open(cliArgs.indivFileName, 'w') as foutput:
+		foutput.write(''.join(genomes))
+	with open(cliArgs.evalsFileName, 'r') as finput:
+		evaluations = [ line.rstrip('\n') for line in finput if line.strip() != '' ]
+	writeBatch(toServer, batchID, evaluations)
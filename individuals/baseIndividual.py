@@ -18,10 +18,24 @@ class BaseIndividual(object):
        - Strict comparison of the individuals, given that __lt__() is defined
 	       for the derived class. By default, strict comparison between scores
 	       will be used.
-       - ID check and renewal.
+       - ID check and renewal. After a renewal parentID holds the
+	       previous ID (None for the newly created individuals), which the
+	       communicators use to send the genomes as changes to the parents.
        - Check for score existence.
 	     - Ancestry tracking.
+       - Count of the nonzero values, kept together with the ID it is
+	       valid for. Classes which know how their mutations change it may
+	       update it in O(1) with setNonzeroCount().
+       - Evaluation cost estimate: classes whose evaluations take
+	       different times may redefine evaluationCostEstimate() to help
+	       the parallel communicators balance the load.
+       - Binary representation: classes whose self.values is a
+	       sequence of numbers of constant length may set valuesDtype to
+	       'int8', 'int32' or 'float64' to support the binary protocol of
+	       the communicators.
    '''
+	valuesDtype = None
+
 	def __init__(self, params):
 		self.renewID() # must be done before params assignment, otherwise ancestry tracking won't work
 		self.params = translateParametersDictionary(params, self.optionalParametersTranslator(), requiredParametersTranslator=self.requiredParametersTranslator())
@@ -84,6 +98,7 @@ class BaseIndividual(object):
 			import __builtin__
 			self.ancestry.append((self.id, __builtin__.globalGenerationCounter)) # teleported here from evolvers.baseEvolver
 		global currentID
+		self.parentID = getattr(self, 'id', None)
 		self.id = currentID
 		currentID = currentID + 1
 
@@ -107,8 +122,32 @@ class BaseIndividual(object):
 		valueStrings = scoreStr.split()
 		if len(valueStrings) != 2:
 			raise ValueError('Incorrectly formatted evaluation line')
-		if self.checkID(int(valueStrings[0])):
-			self.score = float(valueStrings[1])
+		self.setEvaluationValues(int(valueStrings[0]), float(valueStrings[1]))
+
+	def setEvaluationValues(self, ID, score):
+		'''Same as setEvaluation(), for the evaluations which were
+       already parsed (e.g. for the whole batch at once)'''
+		if self.checkID(ID):
+			self.score = score
+
+	def countNonzeroValues(self):
+		'''Returns the number of nonzero values. The values are
+       counted once per ID unless the class keeps the count
+       up to date with setNonzeroCount().'''
+		if getattr(self, 'nonzeroCount', (None, 0))[0] != self.id:
+			self.nonzeroCount = (self.id, int(np.count_nonzero(self.values)))
+		return self.nonzeroCount[1]
+
+	def setNonzeroCount(self, count):
+		'''Call after changing the values, with their new number
+       of nonzero values (after renewID() if it is called)'''
+		self.nonzeroCount = (self.id, count)
+
+	def evaluationCostEstimate(self):
+		'''Returns a number proportional to the expected evaluation time
+       of the individual, or None if it is unknown. Communicators fit
+       the actual times, so any monotonic proxy will do.'''
+		return None
 
 	def noisifyScore(self, amplitude):
 		self.score += (np.random.random()*2-1)*amplitude
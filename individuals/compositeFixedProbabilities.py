@@ -97,6 +97,11 @@ class Individual(BaseIndividual):
 	def __str__(self):
 		return str(self.id) + ' ' + ' '.join([ s.split(' ', 1)[1] for s in map(str, self.parts)])
 
+	def evaluationCostEstimate(self):
+		estimates = [ part.evaluationCostEstimate() for part in self.parts ]
+		known = [ e for e in estimates if not e is None ]
+		return sum(known) if known else None
+
 	def mutate(self):
 		roll = np.random.random()
 		psum = 0.
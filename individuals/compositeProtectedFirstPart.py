@@ -32,6 +32,10 @@ class Individual(CompositeFixedProbabilitiesIndividual):
 		connectionCost = len(filter(lambda x: x!=0, self.parts[1].values))
 		return self.params['timeEstimateCoefficient']*np.power(float(connectionCost), self.params['timeEstimatePower'])
 
+	def evaluationCostEstimate(self):
+		# the controllers with more connections take longer to simulate
+		return 1. + len(filter(lambda x: x!=0, self.parts[1].values))
+
 	def probabilityOfMorphologicalMutation(self):
 		tsmm = __builtin__.globalGenerationCounter - self.timeOfLastMorphologicalMutation
 		return 1./ (1. + np.exp((self.controllerTimeLimit() - tsmm)/self.params['timeEstimateWidth']))
@@ -10,6 +10,8 @@ class Individual(BaseIndividual):
      mechanisms those classes inherit from realVector and
      represent the weights as real values internally.
   '''
+	valuesDtype = 'int32'
+
 	def fromStr(self, representation):
 		vals = map(int, representation.split())
 		self.id = vals[0]
@@ -18,6 +20,7 @@ class Individual(BaseIndividual):
 	def setValuesToZero(self): # for sparse-first search only! Use setValuesToTheFirstSet() for bruteforce applications
 		self.values = np.zeros(self.params['length'], dtype=np.int)
 		self.renewID()
+		self.setNonzeroCount(0)
 
 	def requiredParametersTranslator(self):
 		t = super(Individual, self).requiredParametersTranslator()
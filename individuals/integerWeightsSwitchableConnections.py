@@ -47,6 +47,8 @@ class Individual(RealWeightsSwitchableConnections):
        initProbabilityOfConnection (default 1) -
          provides a mechanism for generating sparse networks.
 	'''
+	valuesDtype = 'int32' # the genome is sent to the clients as integers
+
 	def __init__(self, params):
 		super(Individual, self).__init__(params)
 
@@ -3,6 +3,8 @@ from baseIndividual import BaseIndividual
 
 class Individual(BaseIndividual):
 	'''Base class for real-valued vectors. Do not use, inherit.'''
+	valuesDtype = 'float64'
+
 	def fromStr(self, representation):
 		vals = map(float, representation.split())
 		self.id = int(vals[0])
@@ -11,6 +13,7 @@ class Individual(BaseIndividual):
 	def setValuesToZero(self): # for sparse-first search only! Use setValuesToTheFirstSet() for bruteforce applications
 		self.values = np.zeros(self.params['length'], dtype=np.float)
 		self.renewID()
+		self.setNonzeroCount(0)
 
 	def requiredParametersTranslator(self):
 		t = super(Individual, self).requiredParametersTranslator()
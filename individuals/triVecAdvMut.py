@@ -23,7 +23,8 @@ class Individual(TriVecIndividual):
 		return t
 
 	def insert(self):
-		space = len(self.values) - np.count_nonzero(self.values)
+		nonzeroCount = self.countNonzeroValues()
+		space = len(self.values) - nonzeroCount
 		if space < 1:
 			return False
 		pos = np.random.randint(space)
@@ -31,13 +32,14 @@ class Individual(TriVecIndividual):
 			if self.values[i] == 0:
 				if pos == 0:
 					self.values[i] = 1 if np.random.random() > 0.5 else -1
+					self.setNonzeroCount(nonzeroCount + 1)
 					return True
 				else:
 					pos -= 1
 		print("Insert: One should not dwell here\n")
 
 	def delete(self):
-		space = np.count_nonzero(self.values)
+		space = self.countNonzeroValues()
 		if space < 1:	
 			return False
 		pos = np.random.randint(space)
@@ -45,13 +47,14 @@ class Individual(TriVecIndividual):
 			if self.values[i] != 0:
 				if pos == 0:
 					self.values[i] = 0
+					self.setNonzeroCount(space - 1)
 					return True
 				else:
 					pos -= 1
 		print("Delete: One should not dwell here\n")
 
 	def change(self):
-		space = np.count_nonzero(self.values)
+		space = self.countNonzeroValues()
 		if space < 1:
 			return False
 		pos = np.random.randint(space)
@@ -75,5 +78,7 @@ class Individual(TriVecIndividual):
 			else:
 				mutated = self.delete()
 		if mutated:
+			nonzeroCount = self.countNonzeroValues()
 			self.renewID()
+			self.setNonzeroCount(nonzeroCount)
 		return mutated
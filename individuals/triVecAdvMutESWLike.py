@@ -38,7 +38,8 @@ class Individual(TriVecIndividual):
 		return t
 
 	def insert(self):
-		space = len(self.values) - np.count_nonzero(self.values)
+		nonzeroCount = self.countNonzeroValues()
+		space = len(self.values) - nonzeroCount
 		if space < 1:
 			return False
 		pos = np.random.randint(space)
@@ -46,6 +47,7 @@ class Individual(TriVecIndividual):
 			if self.values[i] == 0:
 				if pos == 0:
 					self.values[i] = 1 if np.random.random() > 0.5 else -1
+					self.setNonzeroCount(nonzeroCount + 1)
 					return True
 				else:
 					pos -= 1
@@ -53,9 +55,12 @@ class Individual(TriVecIndividual):
 
 	def initSparse(self):
 		self.values = np.zeros(self.params['length'])
-		while np.count_nonzero(self.values) < self.params['initDensity']:
+		self.setNonzeroCount(0)
+		while self.countNonzeroValues() < self.params['initDensity']:
 			self.insert()
+		nonzeroCount = self.countNonzeroValues()
 		self.renewID()
+		self.setNonzeroCount(nonzeroCount)
 
 	def countRegulators(self, node):
 		adjMat = self.values.reshape(self.numNodes, self.numNodes)
@@ -63,6 +68,7 @@ class Individual(TriVecIndividual):
 		return np.count_nonzero(connections)
 
 	def mutateNode(self, node):
+		nonzeroCount = self.countNonzeroValues()
 		regulators = self.countRegulators(node)
 		randNum = np.random.random()
 		if randNum < self.deleteFrac and regulators != 0:
@@ -76,6 +82,7 @@ class Individual(TriVecIndividual):
 					pos -= 1
 				secondNode += 1
 			self.values[secondNode*self.numNodes + node] = 0
+			self.setNonzeroCount(nonzeroCount - 1)
 		elif randNum < (self.deleteFrac + self.insertFrac) and regulators != self.numNodes:
 			# add randomly selected regulator
 			pos = np.random.randint(self.numNodes - regulators)
@@ -87,6 +94,7 @@ class Individual(TriVecIndividual):
 					pos -= 1
 				secondNode += 1
 			self.values[secondNode*self.numNodes + node] = -1 if np.random.random() < 0.5 else 1
+			self.setNonzeroCount(nonzeroCount + 1)
 		else:
 			if regulators != 0:
 				# remove randomly selected regulator
@@ -100,6 +108,7 @@ class Individual(TriVecIndividual):
 					secondNode += 1
 				self.values[secondNode*self.numNodes + node] = 0
 				regulators -= 1
+				nonzeroCount -= 1
 
 			# add randomly selected regulator
 			pos = np.random.randint(self.numNodes - regulators)
@@ -111,6 +120,7 @@ class Individual(TriVecIndividual):
 					pos -= 1
 				secondNode += 1
 			self.values[secondNode*self.numNodes + node] = -1 if np.random.random() < 0.5 else 1
+			self.setNonzeroCount(nonzeroCount + 1)
 
 	def mutate(self):
 		mutated = False
@@ -119,5 +129,7 @@ class Individual(TriVecIndividual):
 				self.mutateNode(i)
 				mutated = True
 #		if mutated:
+		nonzeroCount = self.countNonzeroValues()
 		self.renewID()
+		self.setNonzeroCount(nonzeroCount)
 		return mutated
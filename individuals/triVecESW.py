@@ -33,7 +33,8 @@ class Individual(TriVecIndividual):
 		return t
 
 	def insert(self):
-		space = len(self.values) - np.count_nonzero(self.values)
+		nonzeroCount = self.countNonzeroValues()
+		space = len(self.values) - nonzeroCount
 		if space < 1:
 			return False
 		pos = np.random.randint(space)
@@ -41,6 +42,7 @@ class Individual(TriVecIndividual):
 			if self.values[i] == 0:
 				if pos == 0:
 					self.values[i] = 1 if np.random.random() > 0.5 else -1
+					self.setNonzeroCount(nonzeroCount + 1)
 					return True
 				else:
 					pos -= 1
@@ -48,9 +50,12 @@ class Individual(TriVecIndividual):
 
 	def initSparse(self):
 		self.values = np.zeros(self.params['length'], dtype=np.int)
-		while np.count_nonzero(self.values) < self.params['initDensity']:
+		self.setNonzeroCount(0)
+		while self.countNonzeroValues() < self.params['initDensity']:
 			self.insert()
+		nonzeroCount = self.countNonzeroValues()
 		self.renewID()
+		self.setNonzeroCount(nonzeroCount)
 
 	def countRegulators(self, node):
 		adjMat = self.values.reshape(self.numNodes, self.numNodes)
@@ -58,6 +63,7 @@ class Individual(TriVecIndividual):
 		return np.count_nonzero(connections)
 
 	def mutateNode(self, node):
+		nonzeroCount = self.countNonzeroValues()
 		regulators = self.countRegulators(node)
 		probDel = (4.0*regulators)/(4.0*regulators + (self.numNodes - regulators))
 		if np.random.random() < probDel:
@@ -71,6 +77,7 @@ class Individual(TriVecIndividual):
 					pos -= 1
 				secondNode += 1
 			self.values[secondNode*self.numNodes + node] = 0
+			self.setNonzeroCount(nonzeroCount - 1)
 		else:
 			# add randomly selected regulator
 			pos = np.random.randint(self.numNodes - regulators)
@@ -82,6 +89,7 @@ class Individual(TriVecIndividual):
 					pos -= 1
 				secondNode += 1
 			self.values[secondNode*self.numNodes + node] = -1 if np.random.random() < 0.5 else 1
+			self.setNonzeroCount(nonzeroCount + 1)
 
 	def mutate(self):
 		mutated = False
@@ -90,5 +98,7 @@ class Individual(TriVecIndividual):
 				self.mutateNode(i)
 				mutated = True
 		if mutated:
+			nonzeroCount = self.countNonzeroValues()
 			self.renewID()
+			self.setNonzeroCount(nonzeroCount)
 		return mutated
@@ -10,6 +10,8 @@ class Individual(BaseIndividual):
        mutationProbability - probability that mutation occurs upon 
                              mutate() call (for each value)
 	'''
+	valuesDtype = 'int8'
+
 	def __init__(self, params):
 		super(Individual, self).__init__(params)
 		self.values = np.random.random_integers(-1, 1, size=self.params['length'])
@@ -23,16 +25,19 @@ class Individual(BaseIndividual):
 	def mutate(self):
 		newValues = []
 		mutated = False
+		nonzeroCount = self.countNonzeroValues()
 		for val in self.values:
 			if np.random.random() <= self.params['mutationProbability']:
 				newValues.append(np.random.random_integers(-1, 1))
 				if val != newValues[-1]:
 					mutated = True
+					nonzeroCount += int(newValues[-1] != 0) - int(val != 0)
 			else:
 				newValues.append(val)
 		if mutated:
 			self.renewID()
 			self.values = np.array(newValues)
+			self.setNonzeroCount(nonzeroCount)
 			return True
 		else:
 			return False
@@ -40,6 +45,7 @@ class Individual(BaseIndividual):
 	def setValuesToTheFirstSet(self): # for bruteforce searches
 		self.values = -1*np.ones(self.params['length'], dtype=np.int)
 		self.renewID()
+		self.setNonzeroCount(self.params['length'])
 
 	def increment(self): # for bruteforce searches
 		'''Increments the trinary vector as if it was a trinary number.
@@ -66,6 +72,7 @@ class Individual(BaseIndividual):
 	def setValuesToZero(self): # for sparse-first search
 		self.values = np.zeros(self.params['length'], dtype=np.int)
 		self.renewID()
+		self.setNonzeroCount(0)
 
 	def requiredParametersTranslator(self):
 		t = super(Individual, self).requiredParametersTranslator()
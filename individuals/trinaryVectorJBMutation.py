@@ -18,10 +18,14 @@ class Individual(TriVecIndividual):
 	'''
 	def mutate(self):
 		curpos = 0
+		nonzeroCount = self.countNonzeroValues()
 		for ls in layerSizes:
 			for i in range(ls):
 				if np.random.random() < 1./float(ls):
+					oldVal = self.values[curpos+i]
 					self.values[curpos+i] = np.random.randint(-1,2)
+					nonzeroCount += int(self.values[curpos+i] != 0) - int(oldVal != 0)
 			curpos += ls
 		self.renewID()
+		self.setNonzeroCount(nonzeroCount)
 		return True
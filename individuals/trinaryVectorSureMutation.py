@@ -12,8 +12,11 @@ class Individual(TriVecIndividual):
 	'''
 	def mutate(self):
 		idx = np.random.randint(self.params['length'])
+		nonzeroCount = self.countNonzeroValues()
+		oldVal = self.values[idx]
 		possibleVals = [-1, 0, 1]
-		possibleVals.remove(self.values[idx])
+		possibleVals.remove(oldVal)
 		self.values[idx] = np.random.choice(possibleVals)
 		self.renewID()
+		self.setNonzeroCount(nonzeroCount + int(self.values[idx] != 0) - int(oldVal != 0))
 		return True
@@ -41,6 +41,7 @@ class Individual(TrinaryVectorIndividual):
 		if p is None:
 			return False
 		else:
+			self.setNonzeroCount(self.countNonzeroValues() + 1)
 			self.values[p] = np.random.choice([-1,1])
 			return True
 
@@ -49,6 +50,7 @@ class Individual(TrinaryVectorIndividual):
 		if p is None:
 			return False
 		else:
+			self.setNonzeroCount(self.countNonzeroValues() - 1)
 			self.values[p] = 0
 			return True
 
@@ -57,7 +59,9 @@ class Individual(TrinaryVectorIndividual):
 		if p is None:
 			return False
 		else:
+			nonzeroCount = self.countNonzeroValues() - int(self.values[p] != 0)
 			self.values[p] = -1 if self.values[p] == 1 else 1
+			self.setNonzeroCount(nonzeroCount + 1)
 			return True
 
 	def mutate(self):
@@ -72,5 +76,7 @@ class Individual(TrinaryVectorIndividual):
 				mutated = self.deleteConnection()
 			else:
 				mutated = self.modifyConnection()
+		nonzeroCount = self.countNonzeroValues()
 		self.renewID()
+		self.setNonzeroCount(nonzeroCount)
 		return True
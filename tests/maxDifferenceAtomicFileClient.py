@@ -0,0 +1,47 @@
+#!/usr/bin/python2
+
+# Same as maxDifferenceClient.py, but for the atomicTextFile communicator:
+# waits for a new batch number in the individuals file and writes the
+# evaluations under a temporary name, then renames the file
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from communicators.atomicTextFile import DirectoryWatcher, readSequenced, writeAtomically, sequenceHeader
+
+def parseGenome(genStr):
+	fields = genStr.split()
+	return (int(fields[0]), map(float, fields[1:]))
+
+def evaluateGenome(parsedGenome):
+	id, fields = parsedGenome
+	eval = 0.0
+	mult = 1.0
+	for f in fields:
+		eval += mult*f
+		mult = -1.0 if mult==1.0 else 1.0
+	eval = eval if eval>0 else -1.0*eval
+	return (id, eval)
+
+def evalToStr(eval):
+	id, value = eval
+	return str(id) + ' ' + str(value)
+
+import argparse
+
+cliParser = argparse.ArgumentParser(description='Test client for atomicTextFile which likes it when the difference between the adjacent genes is high.')
+cliParser.add_argument('indivFileName', metavar='indivFileName', type=str, help='file with the individual genomes')
+cliParser.add_argument('evalsFileName', metavar='evalsFileName', type=str, help='file for the individual evaluations')
+cliArgs = cliParser.parse_args()
+
+watcher = DirectoryWatcher(os.path.dirname(os.path.abspath(cliArgs.indivFileName)), 0.05)
+lastSeq = None
+while True:
+	seq, genomeStrs = readSequenced(cliArgs.indivFileName)
+	if seq is None or seq == lastSeq:
+		watcher.wait()
+		continue
+	watcher.reset()
+	evalStrs = map(evalToStr, map(evaluateGenome, map(parseGenome, genomeStrs)))
+	writeAtomically(cliArgs.evalsFileName, sequenceHeader(seq) + ''.join([ s + '\n' for s in evalStrs ]))
+	lastSeq = seq
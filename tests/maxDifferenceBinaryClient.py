@@ -0,0 +1,45 @@
+#!/usr/bin/python2
+
+# Same as maxDifferenceClient.py, but speaks the binary protocol
+# (protocol = binary in [commParams], see docs/communicators.binaryFraming).
+# Works with unixPipe by default and with persistentUnixPipe if --persistent is given
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from communicators.binaryFraming import readRequest, packResponse
+
+import numpy as np
+
+def evaluateGenomes(values):
+	signs = np.ones(values.shape[1])
+	signs[1::2] = -1.
+	return np.abs(np.dot(values.astype(np.float64), signs))
+
+import argparse
+
+cliParser = argparse.ArgumentParser(description='Binary protocol test client which likes it when the difference between the adjacent genes is high.')
+cliParser.add_argument('indivFileName', metavar='indivFileName', type=str, help='pipe for incoming individual genomes')
+cliParser.add_argument('evalsFileName', metavar='evalsFileName', type=str, help='pipe for outgoing individual evaluations')
+cliParser.add_argument('--persistent', action='store_true', help='keep the pipes open between the batches, as persistentUnixPipe expects')
+cliArgs = cliParser.parse_args()
+
+if cliArgs.persistent:
+	fin = open(cliArgs.indivFileName, 'rb') # the order of opening matters: individuals first
+	fout = open(cliArgs.evalsFileName, 'wb')
+
+while True:
+	if not cliArgs.persistent:
+		fin = open(cliArgs.indivFileName, 'rb')
+	try:
+		batchID, ids, values = readRequest(fin)
+	except EOFError:
+		break
+	if not cliArgs.persistent:
+		fin.close()
+		fout = open(cliArgs.evalsFileName, 'wb')
+	fout.write(packResponse(batchID, ids, evaluateGenomes(values)))
+	if cliArgs.persistent:
+		fout.flush()
+	else:
+		fout.close()
@@ -0,0 +1,62 @@
+#!/usr/bin/python2
+
+# Same as maxDifferenceClient.py, but understands the delta protocol
+# (protocol = delta in [commParams], see communicators/deltaEncoding.py):
+# remembers the recent genomes and rebuilds the offspring from the changes.
+# Genomes whose parents it does not remember are not evaluated, the server
+# resends them in full. Works with unixPipe by default and with
+# persistentUnixPipe if --persistent is given
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from communicators.deltaEncoding import DeltaDecoder
+from communicators.batchFraming import readBatch, writeBatch
+
+def evaluateGenome(parsedGenome):
+	id, fields = parsedGenome
+	eval = 0.0
+	mult = 1.0
+	for f in map(float, fields):
+		eval += mult*f
+		mult = -1.0 if mult==1.0 else 1.0
+	eval = eval if eval>0 else -1.0*eval
+	return (id, eval)
+
+def evalToStr(eval):
+	id, value = eval
+	return str(id) + ' ' + str(value)
+
+def evaluateLines(genomeStrs):
+	genomes = [ g for g in map(decoder.decode, genomeStrs) if not g is None ]
+	return map(evalToStr, map(evaluateGenome, genomes))
+
+import argparse
+
+cliParser = argparse.ArgumentParser(description='Delta protocol test client which likes it when the difference between the adjacent genes is high.')
+cliParser.add_argument('indivFileName', metavar='indivFileName', type=str, help='pipe for incoming individual genomes')
+cliParser.add_argument('evalsFileName', metavar='evalsFileName', type=str, help='pipe for outgoing individual evaluations')
+cliParser.add_argument('--table-size', type=int, default=1000, help='number of genomes to remember; must be at least deltaTableSize of the server')
+cliParser.add_argument('--persistent', action='store_true', help='keep the pipes open between the batches, as persistentUnixPipe expects')
+cliArgs = cliParser.parse_args()
+
+decoder = DeltaDecoder(cliArgs.table_size)
+
+if cliArgs.persistent:
+	fin = open(cliArgs.indivFileName, 'r') # the order of opening matters: individuals first
+	fout = open(cliArgs.evalsFileName, 'w')
+	while True:
+		try:
+			batchID, genomeStrs = readBatch(fin, replyStream=fout)
+		except EOFError:
+			break
+		writeBatch(fout, batchID, evaluateLines(genomeStrs))
+else:
+	while True:
+		fin = open(cliArgs.indivFileName, 'r')
+		genomeStrs = fin.read().splitlines()
+		fin.close()
+		evalStrs = evaluateLines(genomeStrs)
+		fout = open(cliArgs.evalsFileName, 'w')
+		fout.write(''.join([ s + '\n' for s in evalStrs ]))
+		fout.close()
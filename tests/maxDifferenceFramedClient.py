@@ -0,0 +1,61 @@
+#!/usr/bin/python2
+
+# Same as maxDifferenceClient.py, but for the persistentUnixPipe and tcpBroker
+# communicators: the connection stays open and the batches are marked with headers
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from communicators.batchFraming import readBatch, writeBatch
+
+def parseGenome(genStr):
+	fields = genStr.split()
+	return (int(fields[0]), map(float, fields[1:]))
+
+def evaluateGenome(parsedGenome):
+	id, fields = parsedGenome
+	eval = 0.0
+	mult = 1.0
+	for f in fields:
+		eval += mult*f
+		mult = -1.0 if mult==1.0 else 1.0
+	eval = eval if eval>0 else -1.0*eval
+	return (id, eval)
+
+def evalToStr(eval):
+	id, value = eval
+	return str(id) + ' ' + str(value)
+
+import argparse
+
+cliParser = argparse.ArgumentParser(description='Test client for persistentUnixPipe which likes it when the difference between the adjacent genes is high.')
+cliParser.add_argument('indivFileName', metavar='indivFileName', type=str, help='pipe for incoming individual genomes, the socket if --socket is given or host:port if --tcp is given')
+cliParser.add_argument('evalsFileName', metavar='evalsFileName', type=str, nargs='?', help='pipe for outgoing individual evaluations')
+cliParser.add_argument('--socket', action='store_true', help='connect to a unix domain socket instead of opening a pair of pipes')
+cliParser.add_argument('--tcp', action='store_true', help='connect to a tcpBroker instead of opening a pair of pipes')
+cliParser.add_argument('--delay', type=float, default=0., help='seconds to sleep per evaluation, to imitate slow workers')
+cliArgs = cliParser.parse_args()
+
+if cliArgs.socket or cliArgs.tcp:
+	import socket
+	if cliArgs.socket:
+		connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		connection.connect(cliArgs.indivFileName)
+	else:
+		host, port = cliArgs.indivFileName.rsplit(':', 1)
+		connection = socket.create_connection((host, int(port)))
+	fin = connection.makefile('r')
+	fout = connection.makefile('w')
+else:
+	fin = open(cliArgs.indivFileName, 'r') # the order of opening matters: individuals first
+	fout = open(cliArgs.evalsFileName, 'w')
+
+while True:
+	try:
+		batchID, genomeStrs = readBatch(fin, replyStream=fout)
+	except EOFError:
+		break
+	evalStrs = map(evalToStr, map(evaluateGenome, map(parseGenome, genomeStrs)))
+	time.sleep(cliArgs.delay*len(genomeStrs))
+	writeBatch(fout, batchID, evalStrs)
@@ -0,0 +1,33 @@
+# Same fitness as in maxDifferenceClient.py, as a function for the
+# pythonFunction communicator:
+#
+# [commParams]
+# fitnessFunction = tests/maxDifferenceFunction.py:maxDifference
+#
+# Fidelity level 0 imitates a simulation cut short: only the first half of
+# the genes is counted. Any other level is the full evaluation.
+
+def maxDifference(values, fidelity=None):
+	if fidelity == 0:
+		values = values[:(len(values)+1)//2]
+	eval = 0.0
+	mult = 1.0
+	for f in values:
+		eval += mult*float(f)
+		mult = -1.0 if mult==1.0 else 1.0
+	return eval if eval>0 else -1.0*eval
+
+# Vectorized version for the batchFitnessFunction parameter: takes all the
+# genomes of a batch as rows of a 2-D array
+#
+# [commParams]
+# batchFitnessFunction = tests/maxDifferenceFunction.py:maxDifferenceBatch
+
+import numpy as np
+
+def maxDifferenceBatch(values, fidelity=None):
+	if fidelity == 0:
+		values = values[:,:(values.shape[1]+1)//2]
+	signs = np.ones(values.shape[1])
+	signs[1::2] = -1.
+	return np.abs(np.dot(values.astype(np.float64), signs))
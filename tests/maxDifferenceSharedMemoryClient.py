@@ -0,0 +1,42 @@
+#!/usr/bin/python2
+
+# Same as maxDifferenceClient.py, but for the sharedMemory communicator:
+# reads the genomes from the memory-mapped buffer and writes the scores
+# back into it, the pipes only carry the notifications
+# (see docs/communicators.sharedMemory)
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from communicators.batchFraming import readBatch, writeBatch
+from communicators.sharedMemory import openBuffer, parseDoorbell
+
+import numpy as np
+
+def evaluateGenomes(values):
+	signs = np.ones(values.shape[1])
+	signs[1::2] = -1.
+	return np.abs(np.dot(values.astype(np.float64), signs))
+
+import argparse
+
+cliParser = argparse.ArgumentParser(description='Shared memory test client which likes it when the difference between the adjacent genes is high.')
+cliParser.add_argument('indivFileName', metavar='indivFileName', type=str, help='pipe for the notifications about new genomes')
+cliParser.add_argument('evalsFileName', metavar='evalsFileName', type=str, help='pipe for the notifications about new evaluations')
+cliParser.add_argument('bufferFileName', metavar='bufferFileName', type=str, help='memory-mapped file shared with the server')
+cliArgs = cliParser.parse_args()
+
+fin = open(cliArgs.indivFileName, 'r') # the order of opening matters: individuals first
+fout = open(cliArgs.evalsFileName, 'w')
+
+buf = None
+while True:
+	try:
+		batchID, lines = readBatch(fin, replyStream=fout)
+	except EOFError:
+		break
+	bufferID, slot, count, fidelity = parseDoorbell(lines[0])
+	if buf is None or buf.bufferID != bufferID:
+		buf = openBuffer(cliArgs.bufferFileName)
+	buf.scores[slot:slot+count] = evaluateGenomes(buf.values[slot:slot+count])
+	writeBatch(fout, batchID, [])